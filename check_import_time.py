@@ -0,0 +1,38 @@
+'''
+    Measures the import time of the modules used by a table-only run of the experiments
+    and checks it against the import-time budget (parameters.import_budget).
+    The visualisation and statistics stacks must not be loaded until a plotting or testing function is called.
+'''
+
+import os
+import subprocess
+import sys
+import parameters
+
+modules = ['parameters', 'pareto', 'estimating', 'plotting', 'tests']   # Modules imported by the experiments
+heavy = ['matplotlib', 'mayavi', 'pylab', 'scipy']                      # Modules that must be loaded lazily
+repetitions = 5                                                         # The best of the repetitions is reported
+
+code = "import sys, time\n"
+code = code + "start = time.time()\n"
+code = code + "import " + ", ".join(modules) + "\n"
+code = code + "print(time.time() - start)\n"
+code = code + "print(' '.join(sorted(set([name.split('.')[0] for name in sys.modules]))))\n"
+
+timings = []
+loaded = []
+
+for repetition in range(0, repetitions):
+    # Every measurement is performed in a fresh interpreter
+    output = subprocess.check_output([sys.executable, "-c", code], cwd = os.path.dirname(os.path.abspath(__file__)))
+    output = output.decode("utf-8").strip().split("\n")
+    timings.append(float(output[-2]))
+    loaded = [name for name in output[-1].split(" ") if name in heavy]
+
+print("Import time of a table-only run = " + str(round(min(timings), 3)) + " seconds (budget = " + str(parameters.import_budget) + " seconds)")
+
+if loaded:
+    print("Modules that should have been loaded lazily: " + ", ".join(loaded))
+
+if loaded or min(timings) > parameters.import_budget:
+    sys.exit(1)
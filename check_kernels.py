@@ -0,0 +1,121 @@
+'''
+    Checks the backends of the numeric kernels (see kernels.py) against each other and against the plain Python
+    implementations they replace, on random fronts with duplicate points and ties.
+    The numba backend is only checked when numba is installed.
+'''
+
+import sys
+import numpy as np
+import kernels
+from hv import HyperVolume
+
+cases = [(1, 3), (2, 3), (10, 2), (50, 3), (200, 3), (100, 4), (300, 3)]    # (points, objectives) of the random fronts
+repetitions = 5                                                             # Random fronts of every size
+tolerance = 1e-9                                                            # Largest relative difference of the real-valued results
+grid_cells = 200000                                                         # Largest grid of the brute-force hypervolume
+
+def brute_dominated(points, others, strict):
+    result = []
+    for point in points:
+        found = False
+        for other in others:
+            if all(other <= point) and (not strict or any(other < point)):
+                found = True
+        result.append(found)
+    return np.asarray(result, dtype = bool)
+
+def brute_frontier(points):
+    # The loop of the original pareto.pareto_frontier_multi
+    kept = [0]
+    for i in range(1, len(points)):
+        if sum([points[i][x] < points[kept[-1]][x] for x in range(len(points[i]))]) >= 1:
+            kept.append(i)
+    keep = np.zeros(len(points), dtype = bool)
+    keep[kept] = True
+    return keep
+
+def brute_distances(front, reference):
+    # The loops of the original estimating.calculate_gd
+    result = []
+    for a in front:
+        nearest = 10000000
+        for b in reference:
+            nearest = min(nearest, np.sqrt(sum([(a[k] - b[k]) ** 2 for k in range(len(a))])))
+        result.append(nearest)
+    return np.asarray(result)
+
+def brute_hypervolume(points, referencePoint):
+    # The sum of the cells of the grid of the point coordinates that are dominated by a point (hv.HyperVolume for the larger grids)
+    referencePoint = np.asarray(referencePoint, dtype = float)
+    points = points[(points <= referencePoint).all(axis = 1)]
+    grids = [np.unique(np.append(points[:, k], referencePoint[k])) for k in range(0, len(referencePoint))]
+    if np.prod([len(grid) for grid in grids]) > grid_cells:
+        return HyperVolume(list(referencePoint), "array").compute(points.tolist())
+    corners = np.stack(np.meshgrid(*[grid[:-1] for grid in grids], indexing = 'ij'), axis = -1).reshape(-1, len(grids))
+    sizes = np.prod(np.stack(np.meshgrid(*[np.diff(grid) for grid in grids], indexing = 'ij'), axis = -1).reshape(-1, len(grids)), axis = 1)
+    covered = np.zeros(len(corners), dtype = bool)
+    for point in points:
+        covered = covered | (point <= corners).all(axis = 1)
+    return float(sizes[covered].sum())
+
+def close(first, second):
+    first = np.asarray(first, dtype = float)
+    second = np.asarray(second, dtype = float)
+    return first.shape == second.shape and np.allclose(first, second, rtol = tolerance, atol = tolerance)
+
+def run(name):
+    '''
+    This method computes every kernel on the random fronts with the selected backend.
+
+    Returns:
+        A list of the (case, kernel, result, result of the plain Python implementation) tuples.
+    '''
+
+    kernels.backend = name
+    random = np.random.RandomState(0)
+    results = []
+
+    for (points, objectives) in cases:
+        for repetition in range(0, repetitions):
+            # Rounding the values gives ties and duplicate points
+            front = np.round(random.rand(points, objectives), 1)
+            others = np.round(random.rand(points + 3, objectives), 1)
+            case = (points, objectives, repetition)
+
+            results.append((case, "dominated", kernels.dominated(front, others), brute_dominated(front, others, False)))
+            results.append((case, "dominated strict", kernels.dominated(front, others, True), brute_dominated(front, others, True)))
+            results.append((case, "dominated self", kernels.dominated(front, front, True), brute_dominated(front, front, True)))
+            ordered = front[front[:, 0].argsort()]
+            results.append((case, "frontier", kernels.frontier(ordered), brute_frontier(ordered)))
+            results.append((case, "distances", kernels.distances(front, others), brute_distances(front, others)))
+            referencePoint = [0.9] * objectives
+            results.append((case, "hypervolume", kernels.hypervolume(front, referencePoint), brute_hypervolume(front, referencePoint)))
+
+    return results
+
+backends = ["numpy"]
+if kernels.jit():
+    backends.append("numba")
+else:
+    print("numba is not installed, only the NumPy backend is checked")
+
+failures = 0
+outputs = {}
+
+for name in backends:
+    outputs[name] = run(name)
+    for (case, kernel, result, expected) in outputs[name]:
+        if not close(result, expected):
+            print(name + " backend, " + kernel + " kernel differs from the plain Python implementation for " + str(case))
+            failures = failures + 1
+
+if len(backends) > 1:
+    for (first, second) in zip(outputs["numpy"], outputs["numba"]):
+        if not close(first[2], second[2]):
+            print("numpy and numba backends differ on the " + first[1] + " kernel for " + str(first[0]))
+            failures = failures + 1
+
+print("Checked " + str(sum([len(results) for results in outputs.values()])) + " kernel calls (backends: " + ", ".join(backends) + "): " + str(failures) + " differences")
+
+if failures > 0:
+    sys.exit(1)
@@ -1,25 +1,78 @@
-import matplotlib.pyplot as plt
 import random
 import csv
-import matplotlib.lines as lines
 import numpy
-import scipy as sp
 import math
-from mpl_toolkits.mplot3d import Axes3D
+import warnings
 from os import listdir
 from os.path import isfile, join, exists
 from hv import *
 from numpy import linalg
 import utils
+import kernels
 import tests
+import quantiles
+import experiment
 
 #
 # Parameters
 #
 digits = 3              # Number of digits for rounding the results
 objectives = 3          # Number of optimisation objectives
+sketch_size = 200       # Size parameter (k) of the quantile sketches used by the streaming QoS mode
+sampling_points = 16    # Number of log-spaced generations calculated first by the adaptive evolution (see adaptive_evolution)
+sampling_tolerance = 0.01   # Largest interpolation error of the mean indicators, relative to their range, accepted by the adaptive evolution
 
-def calculate_executiontime(start_run, end_run, model, function, algorithm, folder): 
+def executiontime_totals(arguments):
+    '''
+    This method calculates the per-run totals of the execution time of an optimisation approach.
+    The totals are cached in the experiments folder and only recalculated when the results of the run change.
+    
+    Args:
+        arguments: A tuple (run, model, function, algorithm, folder) identifying the run.
+        
+    Returns:
+        A list (count, mean, m2) with the number of execution time values (in seconds), their mean,
+        and the sum of their squared differences from the mean.
+    '''
+    
+    (run, model, function, algorithm, folder) = arguments
+    
+    dir_name = folder + str(run) + "/" + str(model) + "/" + function + "/" + algorithm + "/Results/"
+    
+    files = utils.list_files(dir_name)
+    
+    name = "executiontime_" + str(run) + "_" + str(model) + "_" + function + "_" + algorithm
+    key = utils.fingerprint(dir_name, files)
+    totals = utils.load_cache(folder, name, key)
+    
+    if totals is not None:
+        return totals
+    
+    max = 0    
+    # Find the max generation which has been reached by the algorithm
+    for file in files:
+        temp = int(file[0:-4])
+        if ( temp > max ):
+            max = temp
+    
+    temp_results = []
+    
+    for generation in range(1, max + 1):
+        # Only the ExecutionTime column is parsed
+        temp_results.append(utils.read_columns(dir_name + str(generation) + ".csv", ['ExecutionTime'])[:, 0] / 1000)   # In seconds
+    
+    array = numpy.concatenate(temp_results) if temp_results else numpy.zeros(0)
+    
+    if len(array) == 0:
+        totals = [0, 0.0, 0.0]
+    else:
+        totals = [len(array), float(array.mean()), float(((array - array.mean()) ** 2).sum())]
+    
+    utils.store_cache(folder, name, key, totals)
+    
+    return totals
+
+def calculate_executiontime(start_run, end_run, model, function, algorithm, folder, processes = 1): 
     '''
     This method calculates the total execution time of the input optimisation approaches.
     
@@ -30,43 +83,37 @@ def calculate_executiontime(start_run, end_run, model, function, algorithm, fold
         function: The fitness function(s) used in the experiments (Expensive or Surrogate).
         algorithm: The optimisation algorithm used (Random Search or MOEA).
         folder: The folder of the experiments.
+        processes: The number of worker processes calculating the per-run totals.
         
     Returns:
-        The generational distance indicator for the given Pareto front.
+        The mean and the standard deviation of the execution time per generation (in seconds).
     '''
     
-    total_time = 0
-    counter = 0 
-    temp_results = []
+    arguments = [(run, model, function, algorithm, folder) for run in range(start_run, end_run + 1)]
     
-    for run in range(start_run, end_run + 1):
-        dir_name = folder + str(run) + "/" + str(model) + "/" + function + "/" + algorithm + "/Results/"
-        
-        files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
-        
-        max = 0    
-        # Find the max generation which has been reached by the algorithm
-        for file in files:
-            temp = int(file[0:-4])
-            if ( temp > max ):
-                max = temp
-                
-        for generation in range(1, max + 1):
-            file = folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/Results/" + str(generation) + ".csv"
-                            
-            source_file = open(file, 'rb')
-            csv_file = csv.DictReader(source_file, delimiter = ',')
-                
-            for row in csv_file:
-                temp_results.append(float(row['ExecutionTime'])  / 1000)   # In seconds
-  
-    array = numpy.asarray(temp_results)
-
-    mean = round(array.mean(), digits)
-    std = round(numpy.std(array), digits)
-            
-    mean = mean
-    std = std
+    count = 0 
+    mean = 0.0
+    m2 = 0.0
+    
+    # Combine the per-run totals (parallel variance algorithm)
+    for (run_count, run_mean, run_m2) in utils.parallel_map(executiontime_totals, arguments, processes):
+        if run_count == 0:
+            continue
+        total = count + run_count
+        delta = run_mean - mean
+        mean = mean + delta * run_count / total
+        m2 = m2 + run_m2 + delta * delta * count * run_count / total
+        count = total
+    
+    # No execution time values at all (as numpy does for the mean of an empty array)
+    if count == 0:
+        warnings.warn("No execution time values for " + str(function) + "/" + str(algorithm), RuntimeWarning)
+        return float('nan'), float('nan')
+    
+    std = math.sqrt(m2 / count)
+    
+    mean = round(mean, digits)
+    std = round(std, digits)
     
     return mean, std
 
@@ -89,42 +136,9 @@ def calculate_indicators(run, model, function, algorithm, referencePoint, utopia
         A list containing the four indicators ((Hypervolume, Cardinality, Spread, and Generational Distance).
     '''
     
-    final_generation = utils.find_final_generation(run, model, function, algorithm, folder)
-    dir_name = folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/Pareto/" + "Generation" + str(final_generation) + "/"    
+    reference = experiment.Reference(referencePoint, utopiaPoint, referenceSet)
     
-    volume = 0
-    gd = 0
-    spacing = 0
-    card = 0
-    
-    if exists(dir_name):
-        front_norm = []
-        front = []
-        files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
-            
-        for file in files:
-            csv_file = csv.DictReader(open(dir_name + file, 'rb'), delimiter=',', quotechar='"')
-               
-            for row in csv_file:
-                front_norm.append([(float(row['ResponseTime']) - utopiaPoint[0]) / (referencePoint[0] - utopiaPoint[0]), (float(row['NetworkLatency']) - utopiaPoint[1]) / (referencePoint[1] - utopiaPoint[1]),(float(row['Energy']) - utopiaPoint[2]) / (referencePoint[2] - utopiaPoint[2])])
-                front.append([float(row['ResponseTime']), float(row['NetworkLatency']), float(row['Energy'])])                
-        
-        # Calculate Hypervolume indicator
-        hv = HyperVolume([1, 1, 1])
-        volume = hv.compute(front_norm)
-               
-        # Cardinality indicator
-        card = len(files)
-        
-        # Calculate Delta indicator and Execution time
-        csv_file = csv.DictReader(open(folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/Results/" + str(final_generation) + ".csv", 'rb'), delimiter=',', quotechar='"')
-        for row in csv_file:
-            spacing = row['Spacing']
-        
-        # Generational Distance indicator
-        gd = calculate_gd(front_norm, referenceSet)
-       
-        return [volume, gd, spacing, card]
+    return experiment.load(folder, model).runset(function, algorithm).indicators(run, reference)
 
 def find_mean_and_std(array):
     '''
@@ -157,7 +171,7 @@ def find_mean_and_std(array):
         
     return array_mean, array_std
 
-def evolve_indicators(runs, model, function, algorithm, referencePoint, utopiaPoint, referenceSet, folder): 
+def evolve_indicators(runs, model, function, algorithm, referencePoint, utopiaPoint, referenceSet, folder, processes = 1, adaptive = False): 
     '''
     This method prints the evolution of the performance indicators (Hypervolume, Cardinality, Spread, and Generational Distance) 
     over the generations of the optimisation algorithms.
@@ -172,97 +186,241 @@ def evolve_indicators(runs, model, function, algorithm, referencePoint, utopiaPo
         utopiaPoint: The best possible point achieved by all the experimental runs.
         referenceSet: The normalised reference set of all the experimental runs.
         folder: The folder of the experiments.
+        processes: The number of worker processes calculating the indicators (1 for serial execution, None for all the available cores).
+        adaptive: When True only a sample of the generations is calculated and the others are interpolated (see adaptive_evolution).
         
     Returns:
         The method returns four pairs of lists containing the mean and standard deviation values of the quality indicators.
+        When adaptive, four more lists follow with the error bars of the interpolated mean values (zero for the calculated generations).
     '''
     
     final_generation = utils.find_final_generation(runs, model, function, algorithm, folder)
     
-    hv_total = []
-    gd_total = []
-    delta_total = []
-    card_total = []
+    # (runs x generations x indicators) values, missing generations count as zero
+    if adaptive:
+        values, errors = adaptive_tensor(runs, model, function, [algorithm], referencePoint, utopiaPoint, referenceSet, folder, final_generation, processes)
+        values = values[0]
+    else:
+        values = evolution_tensor(runs, model, function, [algorithm], referencePoint, utopiaPoint, referenceSet, folder, final_generation, processes)[0]
+    
+    hv_mean, hv_std = find_mean_and_std(values[:, :, 0].tolist())
+    gd_mean, gd_std = find_mean_and_std(values[:, :, 1].tolist())
+    delta_mean, delta_std = find_mean_and_std(values[:, :, 2].tolist())   
+    card_mean, card_std = find_mean_and_std(values[:, :, 3].tolist())   
+    
+    if adaptive:
+        errors = numpy.round(errors[0], 4)
+        return hv_mean, hv_std, gd_mean, gd_std, delta_mean, delta_std, card_mean, card_std, errors[:, 0].tolist(), errors[:, 1].tolist(), errors[:, 2].tolist(), errors[:, 3].tolist()
+    
+    return hv_mean, hv_std, gd_mean, gd_std, delta_mean, delta_std, card_mean, card_std
 
-    for run in range(1, runs + 1):             
-        hv_temp = [0] * (final_generation)
-        gd_temp= [0] * (final_generation)
-        delta_temp= [0] * (final_generation)
-        card_temp= [0] * (final_generation)
+def evolution_tensor(runs, model, function, algorithms, referencePoint, utopiaPoint, referenceSet, folder, final_generation, processes = 1): 
+    '''
+    This method calculates, once, the performance indicators (Hypervolume, Generational Distance, Spread, and Cardinality) 
+    of every generation of every run of the optimisation algorithms.
+    
+    Args:
+        runs: The total number of runs of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        function: The fitness function used in the experiments (Expensive or Surrogate).
+        algorithms: The optimisation algorithms used (Random Search or MOEA).
+        referencePoint: The worst possible point achieved by all the experimental runs.
+        utopiaPoint: The best possible point achieved by all the experimental runs.
+        referenceSet: The normalised reference set of all the experimental runs.
+        folder: The folder of the experiments.
+        final_generation: The last generation of interest.
+        processes: The number of worker processes calculating the indicators (1 for serial execution, None for all the available cores).
         
-        for generation in range(1, final_generation + 1): 
-            dir_name = folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/Pareto/Generation" + str(generation) + "/"
-            #print(dir_name)
+    Returns:
+        (algorithms x runs x generations x indicators) array with the indicator values, where missing generations count as zero.
+    '''
+    
+    reference = experiment.Reference(referencePoint, utopiaPoint, referenceSet)
+    data = experiment.load(folder, model)
+    
+    if processes != 1:
+        # A single pool calculates the generations of all the algorithms, which are then memoised
+        items = [(data.runset(function, algorithm), run, generation) for algorithm in algorithms for run in range(1, runs + 1) for generation in range(1, final_generation + 1)]
+        experiment.parallel_indicators(items, reference, processes)
+    
+    return numpy.asarray([data.runset(function, algorithm).evolution(runs, reference, final_generation) for algorithm in algorithms])
+
+def sample_generations(final_generation, points = None):
+    '''
+    This method selects log-spaced generations, which are denser at the start of the runs, where the indicators change the most.
+    
+    Args:
+        final_generation: The last generation of interest.
+        points: The number of generations to be selected (sampling_points when None).
+        
+    Returns:
+        The sorted list of the selected generations, which always includes the first and the final generation.
+    '''
+    
+    if points is None:
+        points = sampling_points
+    
+    if final_generation <= points:
+        return list(range(1, final_generation + 1))
+    
+    return sorted(set([int(g) for g in numpy.round(numpy.geomspace(1, final_generation, points))] + [1, final_generation]))
+
+def adaptive_evolution(runset, runs, reference, final_generation, processes = 1, tolerance = None):
+    '''
+    This method calculates the quality indicators of a sample of the generations of every run and interpolates the others.
+    The log-spaced generations of sample_generations are calculated first. Then the middle generation of every interval between
+    two calculated generations is calculated, and the interval is split in two when the mean indicators (over the runs) at the
+    middle generation differ from their linear interpolation by more than the tolerance (relative to the range of the mean indicators),
+    until every interval passes the check or has no generation left in between.
+    The remaining generations are interpolated linearly, per run, between the calculated ones.
+    
+    Args:
+        runset: The experiment.RunSet of the runs.
+        runs: The total number of runs.
+        reference: The Reference data of the indicators.
+        final_generation: The last generation of interest.
+        processes: The number of worker processes calculating the indicators (1 for serial execution, None for all the available cores).
+        tolerance: The largest accepted relative interpolation error (sampling_tolerance when None).
+        
+    Returns:
+        A list of the (runs x generations x indicators) array with the calculated and interpolated indicator values,
+        the (generations x indicators) array with the error bars of the mean indicator values, which are the interpolation errors
+        measured at the middle generation of each interval (zero for the calculated generations), and the list of the calculated generations.
+    '''
+    
+    if tolerance is None:
+        tolerance = sampling_tolerance
+    
+    calculated = {}
+    accepted = []
+    pending = None
+    batch = sample_generations(final_generation)
+    
+    while batch:
+        # (generations x runs x indicators) values of the generations of the batch
+        for (generation, values) in zip(batch, numpy.rollaxis(runset.evolution(runs, reference, final_generation, processes, batch), 1)):
+            calculated[generation] = values
+        
+        if pending is None:
+            # The intervals between the log-spaced generations
+            intervals = list(zip(batch[:-1], batch[1:]))
+        else:
+            means = numpy.asarray([calculated[g].mean(axis = 0) for g in calculated])
+            scale = means.max(axis = 0) - means.min(axis = 0)
+            scale[scale == 0] = 1
             
-            if exists(dir_name):
-                front = []
-                front_norm = []
-                files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
-                
-                for file in files:
-                    csv_file = csv.DictReader(open(dir_name + file, 'rb'), delimiter=',', quotechar='"')
-                    
-                    for row in csv_file:
-                        # Normalise data based on the reference point
-                        front_norm.append([(float(row['ResponseTime']) - utopiaPoint[0]) / (referencePoint[0] - utopiaPoint[0]), (float(row['NetworkLatency']) - utopiaPoint[1]) / (referencePoint[1] - utopiaPoint[1]),(float(row['Energy']) - utopiaPoint[2]) / (referencePoint[2] - utopiaPoint[2])])
-                        front.append([float(row['ResponseTime']), float(row['NetworkLatency']), float(row['Energy'])])                
-
-                # Calculate Hypervolume indicator
-                hv = HyperVolume([1, 1, 1])
-                hv_temp[generation - 1] = hv.compute(front_norm)
-                #print("Generation = ", generation, " and algorithm = ", algorithm)
-               
-                # Generational Distance indicator
-                gd = calculate_gd(front_norm, referenceSet)
-                gd_temp[generation - 1] = gd;
-         
-                # Calculate Delta indicator
-                csv_file = csv.DictReader(open(folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/Results/" + str(generation) + ".csv", 'rb'), delimiter=',', quotechar='"')
-                for row in csv_file:
-                    spacing = row['Spacing']
-                delta_temp[generation - 1] = float(spacing)
-                
-                # Cardinality indicator
-                card_temp[generation - 1] = len(files);
-                ##print("Model = " , model , " Algorithm = ",  algorithm, "Generation = ", generation, " HV = ", volume, " Spacing = ", spacing, " GD = ", gd, " Cardinality = ", len(files))
+            # Check the intervals whose middle generation was just calculated
+            intervals = []
+            for (a, b) in pending:
+                middle = (a + b) // 2
+                weight = (middle - a) / float(b - a)
+                interpolated = (1 - weight) * calculated[a].mean(axis = 0) + weight * calculated[b].mean(axis = 0)
+                error = numpy.abs(calculated[middle].mean(axis = 0) - interpolated)
+                if (error / scale).max() > tolerance:
+                    intervals.extend([(a, middle), (middle, b)])
+                else:
+                    accepted.append((a, b, error))
+        
+        pending = [(a, b) for (a, b) in intervals if b - a > 1]
+        batch = [(a + b) // 2 for (a, b) in pending]
+    
+    generations = sorted(calculated)
+    known = numpy.asarray([calculated[g] for g in generations])
+    values = numpy.zeros((runs, final_generation, 4))
+    
+    for run in range(0, runs):
+        for indicator in range(0, 4):
+            values[run, :, indicator] = numpy.interp(numpy.arange(1, final_generation + 1), generations, known[:, run, indicator])
+    
+    errors = numpy.zeros((final_generation, 4))
+    for (a, b, error) in accepted:
+        errors[a:b - 1] = numpy.maximum(errors[a:b - 1], error)
+    errors[numpy.asarray(generations) - 1] = 0
+    
+    return values, errors, generations
 
-        hv_total.append(hv_temp)
-        gd_total.append(gd_temp)
-        delta_total.append(delta_temp)
-        card_total.append(card_temp)
+def adaptive_tensor(runs, model, function, algorithms, referencePoint, utopiaPoint, referenceSet, folder, final_generation, processes = 1): 
+    '''
+    This method calculates the performance indicators of a sample of the generations of every run of the optimisation algorithms,
+    and interpolates the others (see adaptive_evolution).
+    
+    Args:
+        The arguments are the ones of evolution_tensor.
+        
+    Returns:
+        A list of the (algorithms x runs x generations x indicators) array with the indicator values, where missing generations count as zero,
+        and the (algorithms x generations x indicators) array with the error bars of the mean indicator values.
+    '''
+    
+    reference = experiment.Reference(referencePoint, utopiaPoint, referenceSet)
+    data = experiment.load(folder, model)
+    tensor = []
+    errors = []
+    
+    for algorithm in algorithms:
+        values, error, generations = adaptive_evolution(data.runset(function, algorithm), runs, reference, final_generation, processes)
+        print("Adaptive sampling of " + algorithm + ": calculated " + str(len(generations)) + " of " + str(final_generation) + " generations")
+        tensor.append(values)
+        errors.append(error)
+    
+    return numpy.asarray(tensor), numpy.asarray(errors)
 
-    hv_mean, hv_std = find_mean_and_std(hv_total)
-    gd_mean, gd_std = find_mean_and_std(gd_total)
-    delta_mean, delta_std = find_mean_and_std(delta_total)   
-    card_mean, card_std = find_mean_and_std(card_total)   
+def indicator_tensor(start_run, end_run, model, fixed, variables, referencePoint, utopiaPoint, referenceSet, folder, processes = 1): 
+    '''
+    This method calculates, once, the performance indicators (Hypervolume, Generational Distance, Spread, and Cardinality) 
+    of the last generation of every run of the methods in comparison.
     
-    return hv_mean, hv_std, gd_mean, gd_std, delta_mean, delta_std, card_mean, card_std
+    Args:
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        fixed: This indicates the fixed part of the experiment which can be either the fitness function or the optimisation algorithm used. 
+        variables: This indicates the variable part of the experiment which can be either the fitness function or the optimisation algorithm used. 
+        referencePoint: The worst possible point achieved by all the experimental runs.
+        utopiaPoint: The best possible point achieved by all the experimental runs.
+        referenceSet: The normalised reference set of all the experimental runs.
+        folder: The folder of the experiments.
+        processes: The number of worker processes calculating the indicators (1 for serial execution, None for all the available cores).
+        
+    Returns:
+        (variables x runs x indicators) array with the indicator values.
+    '''
+    
+    reference = experiment.Reference(referencePoint, utopiaPoint, referenceSet)
+    data = experiment.load(folder, model)
+    
+    # Find the right variation point (fitness function or optimisation algorithm) of every run
+    items = [(data.variation(run, variable, fixed[0]), run, None) for variable in variables for run in range(start_run, end_run + 1)]
+    
+    if processes != 1:
+        experiment.parallel_indicators(items, reference, processes)
+    
+    # The next final generations are read while the indicators of the current one are calculated
+    values = [runset.indicators(run, reference) for (runset, run, generation) in experiment.preload(items, reference)]
+    
+    return numpy.asarray(values, dtype = float).reshape(len(variables), end_run - start_run + 1, -1)
 
-def calculate_gd(pareto_front, reference_set):
+def calculate_gd(pareto_front, reference_set, counts = None):
     '''
     This method calculates the generational distance of a given Pareto front from a reference set.
         
     Args:
         pareto_front: The input Pareto front.
         reference_set: The reference set based on which the indicator is calculated.
+        counts: The number of copies of each point of the front (None for one copy of each point).
         
     Returns:
         The value of the generational distance indicator for the given Pareto front.
     '''
     
-    gd = 0
-
-    # Find the closest solution in the reference set for each solution in the Pareto front
-    for i in range(0, len(pareto_front)):
-        min = 10000000
-        for j in range(0, len(reference_set)):
-            temp_distance = distance(pareto_front[i], reference_set[j])
-            if min > temp_distance: 
-                min = temp_distance
-        
-        gd = gd + math.pow(min, 2)
+    if counts is None:
+        counts = [1] * len(pareto_front)
     
-    return math.sqrt(gd) / len(pareto_front)
+    # Find the closest solution in the reference set for each solution in the Pareto front (see kernels.distances)
+    nearest = kernels.distances(pareto_front, reference_set)
+    gd = float(numpy.sum(numpy.asarray(counts) * nearest ** 2))
+    
+    return math.sqrt(gd) / sum(counts)
 
 def distance(a, b):
     '''
@@ -283,7 +441,7 @@ def distance(a, b):
     
     return math.sqrt(distance)
 
-def calculateExecutionTime(start_run, end_run, indicators, indicators_names, model, functions, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, folder, table):
+def calculateExecutionTime(start_run, end_run, indicators, indicators_names, model, functions, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, folder, table, processes = 1):
     '''
     This method calculates the execution time for each of the methods in comparison.
     
@@ -300,6 +458,7 @@ def calculateExecutionTime(start_run, end_run, indicators, indicators_names, mod
         utopiaPoint: The best possible point achieved by all the experimental runs.
         referenceSet: The normalised reference set of all the experimental runs.
         folder: The folder of the experiments.
+        processes: The number of worker processes calculating the execution time totals.
         
     Returns:
         The calculated results in the desired Latex table format.
@@ -341,7 +500,7 @@ def calculateExecutionTime(start_run, end_run, indicators, indicators_names, mod
     body = approaches[i] + " & 13376.5 & -  & - \\\\" + "\n" 
     
     for i in range(1, len(results_total) ):
-        [exec_mean, exec_std] = calculate_executiontime(start_run, end_run, model, str(functions[i]), str(algorithms[0]), folder)
+        [exec_mean, exec_std] = calculate_executiontime(start_run, end_run, model, str(functions[i]), str(algorithms[0]), folder, processes)
         body = body + approaches[i] + " & " + str(exec_mean) + " & " # + str(exec_std) + " & "
         body = body + str(round(results_total[i][0]/hv_exp, digits))  + ' & ' + str(int(round(time_exp/exec_mean)))
         body = body + " \\\\"  + "\n"
@@ -350,7 +509,7 @@ def calculateExecutionTime(start_run, end_run, indicators, indicators_names, mod
     table.store()
     return table
     
-def calculateIndicators(start_run, end_run, indicators, indicators_names, model, fixed, variables, approaches, referencePoint, utopiaPoint, referenceSet, label, folder, table):
+def calculateIndicators(start_run, end_run, indicators, indicators_names, model, fixed, variables, approaches, referencePoint, utopiaPoint, referenceSet, label, folder, table, resampling = False, processes = 1):
     '''
     This method calculates the quality indicator values for each of the methods in comparison.
     
@@ -367,29 +526,22 @@ def calculateIndicators(start_run, end_run, indicators, indicators_names, model,
         utopiaPoint: The best possible point achieved by all the experimental runs.
         referenceSet: The normalised reference set of all the experimental runs.
         folder: The folder of the experiments.
+        resampling: When true the p-values come from permutation tests instead of the asymptotic rank-sum tests.
+        processes: The number of worker processes calculating the indicators and performing the permutation tests.
         
     Returns:
-        The calculated results in the desired Latex table format.
+        The calculated results in the desired Latex table format. The means which differ significantly 
+        (corrected pairwise test) from the ones of the first approach are marked with an asterisk.
     '''
     
     results_total = []
     array_total = []
     
-    for variable in variables:
-        results = []
-        
-        for run in range(start_run, end_run + 1):
-            
-            dir_name = folder + str(run) + "/" + model + "/" + variable + "/" + str(fixed[0])
+    # (variables x runs x indicators) values
+    values = indicator_tensor(start_run, end_run, model, fixed, variables, referencePoint, utopiaPoint, referenceSet, folder, processes)
     
-            # Find the right variation point (fitness function or optimisation algorithm)
-            if exists(dir_name):    
-                temp = calculate_indicators(run, model, variable, str(fixed[0]), referencePoint, utopiaPoint, referenceSet, folder)
-            else:  
-                temp = calculate_indicators(run, model, str(fixed[0]), variable, referencePoint, utopiaPoint, referenceSet, folder)
-
-            temp_array = numpy.array(temp)
-            results.append(temp_array)
+    for (index, variable) in enumerate(variables):
+        results = values[index]
             
         results2 = []
 
@@ -412,21 +564,16 @@ def calculateIndicators(start_run, end_run, indicators, indicators_names, model,
     
     print(array_total) 
     
-    # Perform statistical testing of the results
-    array = numpy.asarray(results_total)
-    pvalues = []
+    # Perform statistical testing of the results (all the indicators and pairs of approaches at once)
+    data = numpy.asarray(array_total, dtype = float).reshape(len(variables), indicators, -1).transpose(1, 0, 2)
+    if resampling:
+        comparison = tests.resampling_compare(data, processes, intervals = False)
+    else:
+        comparison = tests.compare(data)
 
-    for ind in range(0, indicators):  
-        for i in range(ind, len(array_total) - 1, indicators):
-               
-            group1 = array_total[i]
-            for j in range(ind + indicators, len(array_total) - 1, indicators):
-                group2 = array_total[j]
-                if i/indicators != j/indicators:
-                    if ind == 0:
-                        print(indicators_names[ind], " ", approaches[i/indicators], " vs. ", approaches[j/indicators], " P-value = " , tests.getPValue(group1, group2))
-                    pvalue = tests.getPValue(group1, group2)
-                    pvalues.append(pvalue)
+    for i in range(0, len(approaches)):
+        for j in range(i + 1, len(approaches)):
+            print(indicators_names[0], " ", approaches[i], " vs. ", approaches[j], " P-value = " , comparison.adjusted[0, i, j], " A12 = ", comparison.a12[0, i, j])
     
     ##
     ### Print Latex table format
@@ -436,11 +583,16 @@ def calculateIndicators(start_run, end_run, indicators, indicators_names, model,
     for i in range(0, len(results_total) ):
         body = body + approaches[i] + " & "
         for j in range(0, len(results_total[0]) - 1, 2):
+            # Mark the means that differ significantly from the ones of the first approach
+            mark = ""
+            if i > 0 and comparison.significant(j // 2, 0, i):
+                mark = "$^{*}$"
+            
             # Add the data without new column 
             if j == len(results_total[0]) - 2 :
-                body = body + str(round(results_total[i][j], 4)) +  ' & $\pm$ ' +  str(round(results_total[i][j+1], 2))
+                body = body + str(round(results_total[i][j], 4)) + mark +  ' & $\pm$ ' +  str(round(results_total[i][j+1], 2))
             else:
-                body = body + str(round(results_total[i][j], 4)) +  ' & $\pm$ ' +  str(round(results_total[i][j+1], 2)) + ' & '
+                body = body + str(round(results_total[i][j], 4)) + mark +  ' & $\pm$ ' +  str(round(results_total[i][j+1], 2)) + ' & '
 
         body = body + ' \\\\'  + "\n"
 
@@ -448,7 +600,37 @@ def calculateIndicators(start_run, end_run, indicators, indicators_names, model,
     table.store()
     return table
    
-def averageQoS(start_run, end_run, model, fixed, variables, approaches, referencePoint, utopiaPoint, referenceSet, folder, table):
+def qos_sketches(arguments):
+    '''
+    This method summarises the QoS metrics of the final generation of a single run with quantile sketches.
+    
+    Args:
+        arguments: A tuple (run, model, variable, fixed, folder) identifying the run.
+        
+    Returns:
+        A list of three sketches, one for each one of the QoS metrics, in the order used by averageQoS.
+    '''
+    
+    (run, model, variable, fixed, folder) = arguments
+    
+    rt_sketch = quantiles.QuantileSketch(sketch_size, seed = run)
+    sr_sketch = quantiles.QuantileSketch(sketch_size, seed = run)
+    nrg_sketch = quantiles.QuantileSketch(sketch_size, seed = run)
+    
+    # Find the right variation point (fitness function or optimisation algorithm)
+    runset = experiment.load(folder, model).variation(run, variable, fixed)
+    
+    # The front is loaded without being memoised, only the sketches are kept
+    front = runset.load_front(run, runset.final_generation(run))[0]
+    
+    if front is not None:
+        rt_sketch.extend(front[:, 0])
+        nrg_sketch.extend(front[:, 1])
+        sr_sketch.extend(100 - front[:, 2])
+    
+    return [rt_sketch, sr_sketch, nrg_sketch]
+
+def averageQoS(start_run, end_run, model, fixed, variables, approaches, referencePoint, utopiaPoint, referenceSet, folder, table, streaming = False, processes = 1):
     '''
     This method calculates the average QoS metrics values for each of the methods in comparison.
     
@@ -463,6 +645,9 @@ def averageQoS(start_run, end_run, model, fixed, variables, approaches, referenc
         utopiaPoint: The best possible point achieved by all the experimental runs.
         referenceSet: The normalised reference set of all the experimental runs.
         folder: The folder of the experiments.
+        streaming: When true the statistics are computed from mergeable quantile sketches (bounded memory and error)
+                   instead of keeping every single QoS value in memory.
+        processes: The number of worker processes building the per-run sketches in streaming mode.
         
     Returns:
         The calculated results in the desired Latex table format.
@@ -473,45 +658,55 @@ def averageQoS(start_run, end_run, model, fixed, variables, approaches, referenc
     headers = ['Mean', 'SD', 'Min', '1st Qu.', 'Median', '3rd Qu.', 'Max']
 
     results = [] 
+    qos_values = []
+    data = experiment.load(folder, model)
 
     for variable in variables:
+        if streaming:
+            arguments = [(run, model, variable, str(fixed[0]), folder) for run in range(start_run, end_run + 1)]
+            sketches = utils.parallel_map(qos_sketches, arguments, processes)
+            
+            for metric in range(0, objectives):
+                sketch = quantiles.merge_sketches([run_sketches[metric] for run_sketches in sketches], sketch_size)
+                results.extend(sketch.summary(digits))
+            continue
+        
         rt_temp = [] 
         sr_temp = []
         nrg_temp = []
 
         for run in range(start_run, end_run + 1):
             
-            dir_name = folder + str(run) + "/" + model + "/" + variable + "/" + str(fixed[0])
-            
             # Find the right variation point (fitness function or optimisation algorithm)
-            if exists(dir_name):    
-                final_generation = utils.find_final_generation(run, model, variable, fixed[0], folder)
-                dir_name = folder + str(run) + "/" + model + "/" + variable + "/" + str(fixed[0]) + "/Pareto/Generation" + str(final_generation) + "/"
-            else:     
-                final_generation = utils.find_final_generation(run, model, fixed[0], variable, folder)
-                dir_name = folder + str(run) + "/" + model + "/" + str(fixed[0]) + "/" + variable + "/Pareto/Generation" + str(final_generation) + "/"
+            front = data.variation(run, variable, fixed[0]).front(run)
             
-            if exists(dir_name):
-                files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
-                
-                for file in files:
-                    csv_file = csv.DictReader(open(dir_name + file, 'rb'), delimiter=',', quotechar='"')
-                    for row in csv_file:
-                        rt_temp.append(float(row['ResponseTime']))
-                        nrg_temp.append(float(row['NetworkLatency']))     
-                        sr_temp.append(100 - float(row['Energy']))     
+            if front is not None:
+                rt_temp.extend(front[:, 0].tolist())
+                nrg_temp.extend(front[:, 1].tolist())
+                sr_temp.extend((100 - front[:, 2]).tolist())
 
         metrics_list = [rt_temp, sr_temp, nrg_temp]
+        qos_values.append(metrics_list)
         
         for metric in metrics_list:
             results.append(round(float(format(numpy.array(metric).mean())), digits))     ##Mean 
             results.append(round(float(format(numpy.array(metric).std())), digits))      ##SD 
             results.append(round(float(format(numpy.array(metric).min())), digits))      ##Min
             results.append(round(float(numpy.percentile(metric, 25)), digits))           ##1st Qu. 
-            results.append(round(float(format(sp.median(numpy.array(metric)))), digits)) ##Median
+            results.append(round(float(format(numpy.median(numpy.array(metric)))), digits)) ##Median
             results.append(round(float(numpy.percentile(metric, 75)), digits))           ##3rd Qu.
             results.append(round(float(format(numpy.array(metric).max())), digits))      ##Max
 
+    # Kruskal-Wallis test of each QoS metric over the approaches in comparison
+    # (the raw values are not kept in streaming mode)
+    pvalues = []
+    
+    for i in range(0, objectives):
+        if streaming:
+            pvalues.append("--")
+        else:
+            pvalues.append(tests.format_pvalue(tests.kruskal_wallis([values[i] for values in qos_values])))
+
     ##
     ## Print Latex table format
     ##
@@ -524,7 +719,7 @@ def averageQoS(start_run, end_run, model, fixed, variables, approaches, referenc
         
         for k in range(0, len(approaches)): 
             body = body + " & " + str(results[counter + k * offset])
-        body = body + " & \multirow{7}{*}{$<$2.2 10$^{-16}$} \\\\" + "\n"    
+        body = body + " & \multirow{7}{*}{" + pvalues[i] + "} \\\\" + "\n"    
 
         counter = counter + 1;
         
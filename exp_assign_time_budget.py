@@ -14,6 +14,9 @@ import plotting
 import os
 import shutil
 
+# Queue the figures and render them all together at the end of the experiment (in parallel, see parameters.processes)
+plotting.deferred = True
+
 #
 # Definition of the experimental specific parameters
 #
@@ -67,4 +70,9 @@ table_file = experiment_folder + 'Indicators.txt'
 table = estimating.Table(header, "", caption,label, table_file)  
 
 table = estimating.calculateIndicators(start_run, end_run, parameters.indicators, parameters.indicators_names, model, algorithms, functions, approaches, referencePoint, utopiaPoint, referenceSet, label, folder, table)
-print(table.latex)
\ No newline at end of file
+print(table.latex)
+
+#
+# Render the queued figures
+#
+plotting.render_pending(parameters.processes)
\ No newline at end of file
@@ -12,6 +12,9 @@ import plotting
 import os
 import shutil
 
+# Queue the figures and render them all together at the end of the experiment (in parallel, see parameters.processes)
+plotting.deferred = True
+
 #
 # Definition of the experimental specific parameters
 #
@@ -62,7 +65,7 @@ label = "tab:MOEAs_ind"
 table_file = experiment_folder + 'Indicators.txt'
 table = estimating.Table(header, "", caption,label, table_file)  
 
-table = estimating.calculateIndicators(start_run, end_run, parameters.indicators, parameters.indicators_names, model, functions, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, label, folder, table)
+table = estimating.calculateIndicators(start_run, end_run, parameters.indicators, parameters.indicators_names, model, functions, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, label, folder, table, resampling = True, processes = parameters.processes)
 print(table.latex)
 
 #
@@ -86,4 +89,9 @@ print(table.latex)
 #
 print('#### Step 5')
 folders = ['files2/1/Decentralised/ExpensiveFunction/NSGAIInew/Pareto/Generation30', 'files2/1/Decentralised/ExpensiveFunction/SPEAII/Pareto/Generation30']
-plotting.pareto2dplot(folders, approaches, parameters.colors, parameters.markers)
\ No newline at end of file
+plotting.pareto2dplot(folders, approaches, parameters.colors, parameters.markers)
+
+#
+# Render the queued figures
+#
+plotting.render_pending(parameters.processes)
\ No newline at end of file
@@ -12,6 +12,9 @@ import plotting
 import os
 import shutil
 
+# Queue the figures and render them all together at the end of the experiment (in parallel, see parameters.processes)
+plotting.deferred = True
+
 #
 # Definition of the experimental specific parameters
 #
@@ -77,4 +80,9 @@ print(table.latex)
 print('#### Step 4')
 ## Plot 3D Pareto Surfaces of composition models in comparison
 folders = ['files/1/Decentralised/ExpensiveFunction/RandomSearch/Pareto/Generation30', 'files/1/Decentralised/ExpensiveFunction/NSGAIInew/Pareto/Generation30']
-plotting.pareto2dplot(folders, approaches, parameters.colors, parameters.markers)
\ No newline at end of file
+plotting.pareto2dplot(folders, approaches, parameters.colors, parameters.markers)
+
+#
+# Render the queued figures
+#
+plotting.render_pending(parameters.processes)
\ No newline at end of file
@@ -0,0 +1,608 @@
+'''
+    The object model of the experiments.
+
+    An Experiment knows the directory layout of the results of a composition model
+    (<folder>/<run>/<model>/<function>/<algorithm>/{Results, Pareto, QoSMetrics}/) and hands out one RunSet
+    per (function, algorithm) pair. A RunSet lazily loads and memoises the Pareto fronts, the QoS metrics and
+    the quality indicators of its runs, so tables and figures produced by the same script share the loading work.
+    The folder may also be a path inside a tar or zip archive (e.g. "results.tar.gz/files2/"), see utils.split_archive.
+'''
+
+import hashlib
+import numpy as np
+import estimating
+import kernels
+import pareto
+import utils
+
+class Schema(object):
+    '''
+    The objectives stored in the solution files of a generation: the columns that are read (in order), the delimiter
+    of the files, and the maximised columns, which are read as their largest value minus the value so every objective is minimised.
+    '''
+
+    def __init__(self, columns, delimiter = ',', maxima = None):
+        self.columns = list(columns)
+        self.delimiter = delimiter
+        self.maxima = maxima if maxima is not None else {}
+
+    def __len__(self):
+        return len(self.columns)
+
+    def empty(self):
+        '''
+        This method returns an array without objective vectors.
+        '''
+
+        return np.zeros((0, len(self.columns)))
+
+    def read(self, filename):
+        '''
+        This method reads the objective vectors of a solution file.
+
+        Returns:
+            Array with one (minimised) objective vector per row of the file.
+        '''
+
+        values = utils.read_columns(filename, self.columns, delimiter = self.delimiter)
+
+        for (i, column) in enumerate(self.columns):
+            if column in self.maxima:
+                values[:, i] = self.maxima[column] - values[:, i]
+
+        return values
+
+# Objectives of the Pareto front files (Pareto/Generation<N>/) and of the QoS metrics files (QoSMetrics/Generation<N>/)
+front_schema = Schema(['ResponseTime', 'NetworkLatency', 'Energy'])
+qos_schema = Schema(['Delay2', 'Energy', 'Success_Ratio'], '\t', {'Success_Ratio': 100})
+
+# Opened experiments, keyed by (folder, model)
+experiments = {}
+
+# Hypervolume and Generational Distance of the fronts, keyed by (content hash of the front, key of the Reference),
+# shared by the generations, runs and experiments with the same front
+front_indicators = {}
+
+def load(folder, model):
+    '''
+    This method returns the (memoised) experiment of a composition model stored in a folder.
+
+    Args:
+        folder: The folder of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+
+    Returns:
+        The Experiment object.
+    '''
+
+    key = (folder, model)
+
+    if key not in experiments:
+        utils.select_archive(folder, model)
+        experiments[key] = Experiment(folder, model)
+
+    return experiments[key]
+
+def preload(items, reference, depth = None):
+    '''
+    This method reads the generations needed by the quality indicators in a pool of threads, ahead of the 
+    indicator calculations, and memoises them in their RunSets as they are consumed (see utils.prefetch_map).
+    
+    Args:
+        items: List of (runset, run, generation) tuples, where a None generation stands for the final one.
+        reference: The Reference data of the indicators (the generations with memoised indicators are not read).
+        depth: The number of generations read ahead (the utils.prefetch_depth when None).
+        
+    Returns:
+        A generator of the (runset, run, generation) tuples, in the input order, whose data are memoised.
+    '''
+    
+    def read(item):
+        (runset, run, generation) = item
+        return runset.read_generation(run, generation, reference)
+    
+    for (item, data) in zip(items, utils.prefetch_map(read, items, depth)):
+        item[0].store_generation(item[1], data, item[2] is None)
+        yield item
+
+def content_hash(front):
+    '''
+    This method hashes the content of a front independently of the order of its points.
+    
+    Args:
+        front: Array with the objective vectors of the front.
+        
+    Returns:
+        A tuple (digest, points, counts) of the hash, the distinct points (in lexicographic order) and the number of copies of each one.
+    '''
+    
+    (points, counts) = np.unique(np.asarray(front, dtype=float), axis=0, return_counts=True)
+    
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(points).tobytes())
+    digest.update(np.ascontiguousarray(counts, dtype=np.int64).tobytes())
+    
+    return (digest.hexdigest(), points, counts)
+
+def parallel_indicators(items, reference, processes = None):
+    '''
+    This method calculates the quality indicators of a list of generations in a pool of worker processes and memoises 
+    them in their RunSets, so the following RunSet.indicators calls do not calculate them again.
+    The experiment and the reference data are published once to the workers (see utils.publish), 
+    so every task only carries the identifiers of its generation.
+    
+    Args:
+        items: List of (runset, run, generation) tuples of the same experiment, where a None generation stands for the final one.
+        reference: The Reference data of the indicators.
+        processes: The number of worker processes (None for all the available cores).
+    '''
+    
+    keys = [item[0].generation_key(item[1], item[2]) + (reference.key,) for item in items]
+    pending = [(item, key) for (item, key) in zip(items, keys) if key not in item[0].indicator_values]
+    
+    if not pending:
+        return
+    
+    data = pending[0][0][0].experiment
+    tasks = [(item[0].function, item[0].algorithm, key[0], key[1]) for (item, key) in pending]
+    results = utils.parallel_map(generation_indicators, tasks, processes, data = {'folder': data.folder, 'model': data.model, 'reference': reference})
+    
+    for ((item, key), values) in zip(pending, results):
+        item[0].indicator_values[key] = values
+
+def generation_indicators(task):
+    '''
+    This method calculates the quality indicators of a generation in a worker process of parallel_indicators.
+    
+    Args:
+        task: A tuple (function, algorithm, run, generation) identifying the generation.
+    
+    Returns:
+        The indicators returned by RunSet.indicators.
+    '''
+    
+    (function, algorithm, run, generation) = task
+    runset = load(utils.shared['folder'], utils.shared['model']).runset(function, algorithm)
+    values = runset.indicators(run, utils.shared['reference'], generation)
+    
+    # Only the indicators are sent back, so the worker does not keep the data of the generation
+    runset.fronts.pop((run, generation), None)
+    runset.spacings.pop((run, generation), None)
+    
+    return values
+
+class Reference(object):
+    '''
+    The reference data (referencePoint, utopiaPoint and normalised referenceSet) that the quality indicators are calculated against.
+    The key is a fingerprint of the data, used for memoising the indicators.
+    '''
+
+    def __init__(self, referencePoint, utopiaPoint, referenceSet):
+        self.referencePoint = referencePoint
+        self.utopiaPoint = utopiaPoint
+        self.referenceSet = referenceSet
+
+        digest = hashlib.sha1()
+        for values in [referencePoint, utopiaPoint, referenceSet]:
+            digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+        self.key = digest.hexdigest()
+
+    def normalise(self, front):
+        '''
+        This method normalises a front based on the utopia and the reference point.
+
+        Args:
+            front: Array with the objective vectors of the front.
+
+        Returns:
+            The normalised front.
+        '''
+
+        utopia = np.asarray(self.utopiaPoint, dtype=float)
+        reference = np.asarray(self.referencePoint, dtype=float)
+
+        return (front - utopia) / (reference - utopia)
+
+class Experiment(object):
+    '''
+    The results of all the runs of a composition model stored in a folder.
+    '''
+
+    def __init__(self, folder, model):
+        self.folder = folder
+        self.model = model
+        self.runsets = {}
+        self.references = {}
+
+    def path(self, run, function, algorithm):
+        '''
+        This method returns the directory that holds the results of a run.
+        '''
+
+        return self.folder + str(run) + "/" + self.model + "/" + function + "/" + algorithm + "/"
+
+    def runset(self, function, algorithm):
+        '''
+        This method returns the (memoised) runs of a fitness function and optimisation algorithm pair.
+
+        Args:
+            function: The fitness function used in the experiments (Expensive or Surrogate).
+            algorithm: The optimisation algorithm used (Random Search or MOEA).
+
+        Returns:
+            The RunSet object.
+        '''
+
+        key = (str(function), str(algorithm))
+
+        if key not in self.runsets:
+            self.runsets[key] = RunSet(self, str(function), str(algorithm))
+
+        return self.runsets[key]
+
+    def variation(self, run, variable, fixed):
+        '''
+        This method finds the right variation point (fitness function or optimisation algorithm) of an experiment.
+
+        Args:
+            run: The run used for checking the directory layout.
+            variable: The variable part of the experiment (fitness function or optimisation algorithm).
+            fixed: The fixed part of the experiment (fitness function or optimisation algorithm).
+
+        Returns:
+            The RunSet object of the (variable, fixed) pair.
+        '''
+
+        if utils.path_exists(self.folder + str(run) + "/" + self.model + "/" + str(variable) + "/" + str(fixed)):
+            return self.runset(variable, fixed)
+
+        return self.runset(fixed, variable)
+
+    def final_fronts(self, start_run, end_run, functions, algorithms):
+        '''
+        This method collects the final generation Pareto fronts of a set of runs.
+
+        Returns:
+            Array with all the (not normalised) objective vectors.
+        '''
+
+        fronts = [front_schema.empty()]
+
+        for algorithm in algorithms:
+            for function in functions:
+                runset = self.runset(function, algorithm)
+                for run in range(start_run, end_run + 1):
+                    front = runset.front(run)
+                    if front is not None:
+                        fronts.append(front)
+
+        return np.concatenate(fronts)
+
+    def final_qos(self, start_run, end_run, functions, algorithms):
+        '''
+        This method collects the final generation QoS metrics of a set of runs.
+
+        Returns:
+            Array with all the QoS vectors (see qos_schema).
+        '''
+
+        rows = [qos_schema.empty()]
+
+        for algorithm in algorithms:
+            for function in functions:
+                runset = self.runset(function, algorithm)
+                for run in range(start_run, end_run + 1):
+                    qos = runset.qos(run)
+                    if qos is not None:
+                        rows.append(qos)
+
+        return np.concatenate(rows)
+
+    def reference(self, start_run, end_run, functions, algorithms):
+        '''
+        This method returns the (memoised) reference data of a set of runs, 
+        loaded from the stored reference artifact when its inputs have not changed.
+
+        Returns:
+            A list of the referencePoint, the utopiaPoint, and the normalised referenceSet.
+        '''
+
+        key = (start_run, end_run, tuple(functions), tuple(algorithms))
+
+        if key not in self.references:
+            self.references[key] = pareto.reference_artifact(start_run, end_run, self.model, functions, algorithms, self.folder)
+
+        artifact = self.references[key]
+
+        return [artifact['referencePoint'], artifact['utopiaPoint'], artifact['referenceSet']]
+
+    def clear(self):
+        '''
+        This method drops all the memoised data of the experiment.
+        '''
+
+        self.runsets = {}
+        self.references = {}
+
+class RunSet(object):
+    '''
+    The runs of a fitness function and optimisation algorithm pair of an experiment.
+    '''
+
+    def __init__(self, experiment, function, algorithm):
+        self.experiment = experiment
+        self.function = function
+        self.algorithm = algorithm
+        self.final_generations = {}
+        self.fronts = {}
+        self.qos_rows = {}
+        self.spacings = {}
+        self.indicator_values = {}
+
+    def path(self, run):
+        '''
+        This method returns the directory that holds the results of a run.
+        '''
+
+        return self.experiment.path(run, self.function, self.algorithm)
+
+    def final_generation(self, run):
+        '''
+        This method returns the (memoised) maximum generation achieved by a run.
+        '''
+
+        if run not in self.final_generations:
+            self.final_generations[run] = utils.find_final_generation(run, self.experiment.model, self.function, self.algorithm, self.experiment.folder)
+
+        return self.final_generations[run]
+
+    def generation_key(self, run, generation):
+        '''
+        This method returns the memoisation key of a generation (the final one when generation is None).
+        '''
+
+        if generation is None:
+            generation = self.final_generation(run)
+        return (run, generation)
+
+    def load_front(self, run, generation):
+        '''
+        This method reads the Pareto front of a generation (one file per solution).
+
+        Returns:
+            A pair (front, cardinality) of the array with the objective vectors (see front_schema)
+            and the number of solution files, or (None, 0) when the generation does not exist.
+        '''
+
+        dir_name = self.path(run) + "Pareto/Generation" + str(generation) + "/"
+
+        if not utils.path_exists(dir_name):
+            return (None, 0)
+
+        files = utils.list_files(dir_name)
+        front = [front_schema.empty()]
+
+        for file in files:
+            front.append(front_schema.read(dir_name + file))
+
+        return (np.concatenate(front), len(files))
+
+    def front(self, run, generation = None):
+        '''
+        This method returns the (memoised) Pareto front of a generation (the final one by default).
+
+        Returns:
+            Array with the objective vectors (see front_schema), or None when the generation does not exist.
+        '''
+
+        key = self.generation_key(run, generation)
+
+        if key not in self.fronts:
+            self.fronts[key] = self.load_front(key[0], key[1])
+
+        return self.fronts[key][0]
+
+    def cardinality(self, run, generation = None):
+        '''
+        This method returns the number of solutions of the Pareto front of a generation (the final one by default).
+        '''
+
+        key = self.generation_key(run, generation)
+        self.front(key[0], key[1])
+
+        return self.fronts[key][1]
+
+    def load_qos(self, run, generation):
+        '''
+        This method reads the QoS metrics of a generation, excluding the population file.
+
+        Returns:
+            Array with the QoS vectors (see qos_schema), or None when the generation does not exist.
+        '''
+
+        dir_name = self.path(run) + "QoSMetrics/Generation" + str(generation) + "/"
+
+        if not utils.path_exists(dir_name):
+            return None
+
+        files = [ f for f in utils.list_files(dir_name) if f != 'population.csv' ]
+        rows = [qos_schema.empty()]
+
+        for file in files:
+            rows.append(qos_schema.read(dir_name + file))
+
+        return np.concatenate(rows)
+
+    def qos(self, run, generation = None):
+        '''
+        This method returns the (memoised) QoS metrics of a generation (the final one by default), excluding the population file.
+
+        Returns:
+            Array with the QoS vectors (see qos_schema), or None when the generation does not exist.
+        '''
+
+        key = self.generation_key(run, generation)
+
+        if key not in self.qos_rows:
+            self.qos_rows[key] = self.load_qos(key[0], key[1])
+
+        return self.qos_rows[key]
+
+    def load_spacing(self, run, generation):
+        '''
+        This method reads the spacing indicator reported for a generation.
+        '''
+
+        values = utils.read_columns(self.path(run) + "Results/" + str(generation) + ".csv", ['Spacing'])
+        return float(values[-1, 0])
+
+    def spacing(self, run, generation = None):
+        '''
+        This method returns the (memoised) spacing indicator reported for a generation (the final one by default).
+        '''
+
+        key = self.generation_key(run, generation)
+
+        if key not in self.spacings:
+            self.spacings[key] = self.load_spacing(key[0], key[1])
+
+        return self.spacings[key]
+
+    def read_generation(self, run, generation, reference):
+        '''
+        This method reads, without memoising them, the data that the quality indicators of a generation need.
+        It only reads files, so it can run in a separate thread.
+
+        Args:
+            run: The run number.
+            generation: The generation (the final one when None).
+            reference: The Reference data of the indicators.
+
+        Returns:
+            A tuple (generation, front, spacing), where front is the result of load_front, 
+            or None when the data are already memoised.
+        '''
+
+        if generation is None:
+            if run in self.final_generations:
+                generation = self.final_generations[run]
+            else:
+                generation = utils.find_final_generation(run, self.experiment.model, self.function, self.algorithm, self.experiment.folder)
+
+        if (run, generation, reference.key) in self.indicator_values or (run, generation) in self.fronts:
+            return (generation, None, None)
+
+        front = self.load_front(run, generation)
+        spacing = None
+        if front[0] is not None:
+            spacing = self.load_spacing(run, generation)
+
+        return (generation, front, spacing)
+
+    def store_generation(self, run, data, final = False):
+        '''
+        This method memoises the data returned by read_generation (final is True when it was asked for the final generation).
+        '''
+
+        (generation, front, spacing) = data
+
+        if final:
+            self.final_generations[run] = generation
+
+        if front is None:
+            return
+
+        self.fronts[(run, generation)] = front
+        if spacing is not None:
+            self.spacings[(run, generation)] = spacing
+
+    def indicators(self, run, reference, generation = None):
+        '''
+        This method returns the (memoised) quality indicators of a generation (the final one by default).
+
+        Args:
+            run: The run number.
+            reference: The Reference data of the indicators.
+            generation: The generation (the final one when None).
+
+        Returns:
+            A list containing the four indicators (Hypervolume, Generational Distance, Spread, and Cardinality),
+            or None when the generation does not exist.
+        '''
+
+        key = self.generation_key(run, generation) + (reference.key,)
+
+        if key not in self.indicator_values:
+            front = self.front(key[0], key[1])
+            values = None
+
+            if front is not None:
+                # Identical fronts (e.g., of consecutive generations of a converged run) share their indicators
+                (digest, points, counts) = content_hash(front)
+
+                if (digest, reference.key) not in front_indicators:
+                    # The duplicate points are dropped, and only count for the mean of the distances
+                    front_norm = reference.normalise(points).tolist()
+
+                    # Calculate Hypervolume indicator
+                    volume = kernels.hypervolume(front_norm, [1] * points.shape[1])
+
+                    # Generational Distance indicator
+                    gd = estimating.calculate_gd(front_norm, reference.referenceSet, counts)
+
+                    front_indicators[(digest, reference.key)] = [volume, gd]
+
+                values = front_indicators[(digest, reference.key)] + [self.spacing(key[0], key[1]), self.cardinality(key[0], key[1])]
+
+            self.indicator_values[key] = values
+
+        return self.indicator_values[key]
+
+    def evolution(self, runs, reference, final_generation, processes = 1, generations = None):
+        '''
+        This method calculates the quality indicators of every generation of every run.
+        Missing generations count as zero. Only the indicators of the intermediate generations stay memoised
+        (their fronts are dropped once used), so the memory does not grow with the length of the runs.
+
+        Args:
+            runs: The total number of runs.
+            reference: The Reference data of the indicators.
+            final_generation: The last generation of interest.
+            processes: The number of worker processes calculating the indicators (see parallel_indicators), 1 for this process only.
+            generations: The sorted list of the generations to be calculated (None for all the generations up to final_generation).
+
+        Returns:
+            (runs x generations x indicators) array with the indicator values.
+        '''
+
+        if generations is None:
+            generations = range(1, final_generation + 1)
+
+        position = dict([(generation, index) for (index, generation) in enumerate(generations)])
+        values = np.zeros((runs, len(position), 4))
+        items = [(self, run, generation) for run in range(1, runs + 1) for generation in generations]
+
+        if processes != 1:
+            parallel_indicators(items, reference, processes)
+
+        # The next generations are read while the indicators of the current one are calculated
+        for (runset, run, generation) in preload(items, reference):
+            results = self.indicators(run, reference, generation)
+            if results is not None:
+                values[run - 1, position[generation]] = results
+            if generation != self.final_generation(run):
+                self.fronts.pop((run, generation), None)
+                self.spacings.pop((run, generation), None)
+
+        return values
+
+    def clear(self):
+        '''
+        This method drops all the memoised data of the runs.
+        '''
+
+        self.final_generations = {}
+        self.fronts = {}
+        self.qos_rows = {}
+        self.spacings = {}
+        self.indicator_values = {}
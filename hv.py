@@ -18,6 +18,10 @@
 __author__ = "Simon Wessing"
 
 
+from array import array
+import numpy
+
+
 class HyperVolume:
     """
     Hypervolume computation based on variant 3 of the algorithm in the paper:
@@ -27,11 +31,25 @@ class HyperVolume:
 
     Minimization is implicitly assumed here!
 
+    The linked lists are kept either in preallocated flat arrays indexed by
+    node id (backend "array", see ArrayMultiList) or in one Python object per
+    point (backend "nodes", see MultiList). Both give the same result.
+
+    The dimension sweep grows quickly with the number of objectives, so with
+    more than wfgDimensions objectives the default backend ("auto") switches
+    to the WFG algorithm (backend "wfg", see hvWfg), which slices the front
+    down to wfgDimensions objectives and then uses the dimension sweep.
+
     """
 
-    def __init__(self, referencePoint):
+    wfgDimensions = 4
+
+    def __init__(self, referencePoint, backend="auto"):
         """Constructor."""
         self.referencePoint = referencePoint
+        self.backend = backend
+        if backend == "auto":
+            self.backend = "wfg" if len(referencePoint) > self.wfgDimensions else "array"
         self.list = []
 
 
@@ -62,9 +80,15 @@ class HyperVolume:
             # in the HV computation
             for j in xrange(len(relevantPoints)):
                 relevantPoints[j] = [relevantPoints[j][i] - referencePoint[i] for i in xrange(dimensions)]
-        self.preProcess(relevantPoints)
         bounds = [-1.0e308] * dimensions
-        hyperVolume = self.hvRecursive(dimensions - 1, len(relevantPoints), bounds)
+        if self.backend == "wfg":
+            hyperVolume = self.hvWfg(numpy.asarray(relevantPoints, dtype=float).reshape(-1, dimensions))
+        elif self.backend == "array":
+            self.preProcessArray(relevantPoints)
+            hyperVolume = self.hvRecursiveArray(dimensions - 1, len(relevantPoints), bounds)
+        else:
+            self.preProcess(relevantPoints)
+            hyperVolume = self.hvRecursive(dimensions - 1, len(relevantPoints), bounds)
         return hyperVolume
 
 
@@ -147,6 +171,125 @@ class HyperVolume:
             return hvol
 
 
+    def hvRecursiveArray(self, dimIndex, length, bounds):
+        """Recursive call to hypervolume calculation on an ArrayMultiList.
+
+        This is hvRecursive with every node attribute replaced by a lookup
+        in the per-list arrays of the ArrayMultiList. Node 0 is the sentinel.
+
+        """
+        hvol = 0.0
+        nodeList = self.list
+        if length == 0:
+            return hvol
+        elif dimIndex == 0:
+            # special case: only one dimension
+            return -nodeList.cargo[0][nodeList.next[0][0]]
+        elif dimIndex == 1:
+            # special case: two dimensions, end recursion
+            cargo0 = nodeList.cargo[0]
+            cargo1 = nodeList.cargo[1]
+            next1 = nodeList.next[1]
+            q = next1[0]
+            h = cargo0[q]
+            p = next1[q]
+            while p != 0:
+                hvol += h * (cargo1[q] - cargo1[p])
+                if cargo0[p] < h:
+                    h = cargo0[p]
+                q = p
+                p = next1[q]
+            hvol += h * cargo1[q]
+            return hvol
+        else:
+            cargo = nodeList.cargo[dimIndex]
+            next = nodeList.next[dimIndex]
+            prev = nodeList.prev[dimIndex]
+            area = nodeList.area[dimIndex]
+            volume = nodeList.volume[dimIndex]
+            ignore = nodeList.ignore
+            remove = nodeList.remove
+            reinsert = nodeList.reinsert
+            hvRecursive = self.hvRecursiveArray
+            p = 0
+            q = prev[p]
+            while q != 0:
+                if ignore[q] < dimIndex:
+                    ignore[q] = 0
+                q = prev[q]
+            q = prev[p]
+            while length > 1 and (cargo[q] > bounds[dimIndex] or cargo[prev[q]] >= bounds[dimIndex]):
+                p = q
+                remove(p, dimIndex, bounds)
+                q = prev[p]
+                length -= 1
+            qPrev = prev[q]
+            if length > 1:
+                hvol = volume[qPrev] + area[qPrev] * (cargo[q] - cargo[qPrev])
+            else:
+                areas = nodeList.area
+                cargos = nodeList.cargo
+                areas[0][q] = 1
+                qArea = [areas[i][q] * -cargos[i][q] for i in xrange(dimIndex)]
+                for i in xrange(dimIndex):
+                    areas[i + 1][q] = qArea[i]
+            volume[q] = hvol
+            if ignore[q] >= dimIndex:
+                area[q] = area[qPrev]
+            else:
+                area[q] = hvRecursive(dimIndex - 1, length, bounds)
+                if area[q] <= area[qPrev]:
+                    ignore[q] = dimIndex
+            while p != 0:
+                pCargoDimIndex = cargo[p]
+                hvol += area[q] * (pCargoDimIndex - cargo[q])
+                bounds[dimIndex] = pCargoDimIndex
+                reinsert(p, dimIndex, bounds)
+                length += 1
+                q = p
+                p = next[p]
+                volume[q] = hvol
+                if ignore[q] >= dimIndex:
+                    area[q] = area[prev[q]]
+                else:
+                    area[q] = hvRecursive(dimIndex - 1, length, bounds)
+                    if area[q] <= area[prev[q]]:
+                        ignore[q] = dimIndex
+            hvol -= area[q] * cargo[q]
+            return hvol
+
+
+    def hvWfg(self, points):
+        """Hypervolume calculation with the WFG algorithm of the paper:
+        L. While, L. Bradstreet, and L. Barone. A fast way of calculating exact
+        hypervolumes. IEEE Transactions on Evolutionary Computation,
+        16(1):86-95, 2012.
+
+        The points are relative to the reference point [0, ..., 0]. They are
+        sorted from the worst to the best value of the last objective, so the
+        exclusive hypervolume of a point over the points after it is a slab of
+        its last objective times a hypervolume with one objective less.
+
+        """
+        dimensions = points.shape[1]
+        if len(points) == 0:
+            return 0.0
+        if len(points) == 1:
+            return numpy.prod(-points[0])
+        if len(points) == 2:
+            return numpy.prod(-points[0]) + numpy.prod(-points[1]) - numpy.prod(-numpy.maximum(points[0], points[1]))
+        if dimensions <= self.wfgDimensions:
+            return HyperVolume([0.0] * dimensions, "array").compute(points.tolist())
+        points = points[numpy.argsort(-points[:, -1], kind="mergesort")]
+        hvol = 0.0
+        for k in xrange(len(points)):
+            point = points[k]
+            # the limit set: the points after k, limited to the region dominated by point k
+            limit = nonDominated(numpy.maximum(points[k + 1:, :-1], point[:-1]))
+            hvol += -point[-1] * (numpy.prod(-point[:-1]) - self.hvWfg(limit))
+        return hvol
+
+
     def preProcess(self, front):
         """Sets up the list data structure needed for calculation."""
         dimensions = len(self.referencePoint)
@@ -158,6 +301,18 @@ class HyperVolume:
         self.list = nodeList
 
 
+    def preProcessArray(self, front):
+        """Sets up the array-backed list data structure needed for calculation."""
+        dimensions = len(self.referencePoint)
+        nodeList = ArrayMultiList(dimensions, front)
+        if len(front) > 0:
+            points = numpy.asarray(front, dtype=float)
+            for i in xrange(dimensions):
+                # node ids start at 1, the sentinel is node 0
+                nodeList.extend(numpy.argsort(points[:, i], kind="mergesort") + 1, i)
+        self.list = nodeList
+
+
     def sortByDimension(self, nodes, i):
         """Sorts the list of nodes by the i-th value of the contained points."""
         # build a list of tuples of (point[i], node)
@@ -169,6 +324,21 @@ class HyperVolume:
             
             
             
+def nonDominated(points):
+    """Returns the points that are not weakly dominated by another point,
+    keeping a single copy of duplicate points (minimization)."""
+    if len(points) < 2:
+        return points
+    # a point can only be dominated by a point that comes before it in lexicographic order
+    points = points[numpy.lexsort(points.T[::-1])]
+    keep = [0]
+    for i in xrange(1, len(points)):
+        if not (points[keep] <= points[i]).all(axis=1).any():
+            keep.append(i)
+    return points[keep]
+
+
+
 class MultiList: 
     """A special data structure needed by FonsecaHyperVolume. 
     
@@ -280,7 +450,109 @@ class MultiList:
             node.next[i].prev[i] = node
             if bounds[i] > node.cargo[i]:
                 bounds[i] = node.cargo[i]
-            
+
+
+
+class ArrayMultiList:
+    """A MultiList that keeps its nodes in preallocated arrays.
+
+    A node is an integer id (0 is the sentinel, 1..n are the points) and every
+    attribute of the nodes (cargo, next, prev, area, volume) is one array per
+    list, indexed by the node id. There are no per-node objects or lists, which
+    keeps the memory and the allocations of a hypervolume computation low.
+
+    """
+
+    def __init__(self, numberLists, front=()):
+        """Constructor.
+
+        Builds 'numberLists' empty doubly linked lists over the points of 'front'.
+
+        """
+        self.numberLists = numberLists
+        self.size = len(front) + 1
+        size = self.size
+        self.cargo = [array("d", [0.0] + [point[i] for point in front]) for i in xrange(numberLists)]
+        self.next = [array("l", [0]) * size for i in xrange(numberLists)]
+        self.prev = [array("l", [0]) * size for i in xrange(numberLists)]
+        self.area = [array("d", [0.0]) * size for i in xrange(numberLists)]
+        self.volume = [array("d", [0.0]) * size for i in xrange(numberLists)]
+        self.ignore = array("l", [0]) * size
+
+
+    def __str__(self):
+        strings = []
+        for i in xrange(self.numberLists):
+            currentList = []
+            node = self.next[i][0]
+            while node != 0:
+                currentList.append(str([cargo[node] for cargo in self.cargo]))
+                node = self.next[i][node]
+            strings.append(str(currentList))
+        stringRepr = ""
+        for string in strings:
+            stringRepr += string + "\n"
+        return stringRepr
+
+
+    def __len__(self):
+        """Returns the number of lists that are included in this MultiList."""
+        return self.numberLists
+
+
+    def getLength(self, i):
+        """Returns the length of the i-th list."""
+        next = self.next[i]
+        length = 0
+        node = next[0]
+        while node != 0:
+            length += 1
+            node = next[node]
+        return length
+
+
+    def extend(self, nodes, index):
+        """Extends the list at the given index with the node ids."""
+        next = self.next[index]
+        prev = self.prev[index]
+        for node in nodes:
+            node = int(node)
+            lastButOne = prev[0]
+            next[node] = 0
+            prev[node] = lastButOne
+            # set the last element as the new one
+            prev[0] = node
+            next[lastButOne] = node
+
+
+    def remove(self, node, index, bounds):
+        """Removes and returns 'node' from all lists in [0, 'index'[."""
+        for i in xrange(index):
+            next = self.next[i]
+            prev = self.prev[i]
+            predecessor = prev[node]
+            successor = next[node]
+            next[predecessor] = successor
+            prev[successor] = predecessor
+            value = self.cargo[i][node]
+            if bounds[i] > value:
+                bounds[i] = value
+        return node
+
+
+    def reinsert(self, node, index, bounds):
+        """
+        Inserts 'node' at the position it had in all lists in [0, 'index'[
+        before it was removed.
+
+        """
+        for i in xrange(index):
+            self.next[i][self.prev[i][node]] = node
+            self.prev[i][self.next[i][node]] = node
+            value = self.cargo[i][node]
+            if bounds[i] > value:
+                bounds[i] = value
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+'''
+    Numeric kernels of the dominance checks and the quality indicators, over contiguous float64 arrays.
+
+    Every kernel has a NumPy implementation and a JIT-compiled one, which is used when numba is installed.
+    numba is imported lazily, on the first call of a kernel, so it does not add to the import time of the experiments,
+    and the backend is chosen at runtime (see select). check_kernels.py checks the backends against each other.
+'''
+
+import numpy as np
+from hv import HyperVolume
+
+# Global Variables
+backend = "auto"        # Backend of the kernels: "auto" (numba when it is installed, NumPy otherwise), "numba" or "numpy"
+block_size = 1024       # Number of points compared at once by the NumPy kernels
+compiled = None         # The JIT-compiled kernels, keyed by name (False when numba is not installed)
+
+def dominated_loop(points, others, strict, result):
+    '''
+    This method is the JIT-compiled kernel of dominated.
+    '''
+
+    for i in range(points.shape[0]):
+        for j in range(others.shape[0]):
+            weakly = True
+            better = False
+            for k in range(points.shape[1]):
+                if others[j, k] > points[i, k]:
+                    weakly = False
+                    break
+                if others[j, k] < points[i, k]:
+                    better = True
+            if weakly and (better or not strict):
+                result[i] = True
+                break
+
+def frontier_loop(points, keep):
+    '''
+    This method is the JIT-compiled kernel of frontier.
+    '''
+
+    last = 0
+    keep[0] = True
+    for i in range(1, points.shape[0]):
+        for k in range(points.shape[1]):
+            if points[i, k] < points[last, k]:
+                keep[i] = True
+                last = i
+                break
+
+def distances_loop(front, reference, result):
+    '''
+    This method is the JIT-compiled kernel of distances.
+    '''
+
+    for i in range(front.shape[0]):
+        nearest = 10000000.0
+        for j in range(reference.shape[0]):
+            total = 0.0
+            for k in range(front.shape[1]):
+                difference = front[i, k] - reference[j, k]
+                total += difference * difference
+            total = np.sqrt(total)
+            if total < nearest:
+                nearest = total
+        result[i] = nearest
+
+def hypervolume_loop(points, referencePoint):
+    '''
+    This method is the JIT-compiled kernel of hypervolume for three objectives (points that weakly dominate the reference point):
+    the points are added from the best to the worst value of the third objective, and every slab between two consecutive
+    values adds the two-objective hypervolume of the points added so far, which are kept sorted on the first objective.
+    '''
+
+    n = points.shape[0]
+    order = np.argsort(points[:, 2])
+    xs = np.empty(n)
+    ys = np.empty(n)
+    volume = 0.0
+
+    for added in range(n):
+        i = order[added]
+        position = added
+        while position > 0 and xs[position - 1] > points[i, 0]:
+            xs[position] = xs[position - 1]
+            ys[position] = ys[position - 1]
+            position -= 1
+        xs[position] = points[i, 0]
+        ys[position] = points[i, 1]
+
+        if added == n - 1:
+            depth = referencePoint[2] - points[i, 2]
+        else:
+            depth = points[order[added + 1], 2] - points[i, 2]
+
+        if depth > 0:
+            area = 0.0
+            height = referencePoint[1]
+            for j in range(added + 1):
+                if ys[j] < height:
+                    area += (referencePoint[0] - xs[j]) * (height - ys[j])
+                    height = ys[j]
+            volume += area * depth
+
+    return volume
+
+def jit():
+    '''
+    This method compiles the kernels with numba the first time it is called.
+
+    Returns:
+        A dictionary of the compiled kernels keyed by name, or False when numba is not installed.
+    '''
+
+    global compiled
+
+    if compiled is None:
+        try:
+            import numba
+        except ImportError:
+            compiled = False
+        else:
+            compiled = {}
+            for kernel in [dominated_loop, frontier_loop, distances_loop, hypervolume_loop]:
+                compiled[kernel.__name__] = numba.njit(kernel)
+
+    return compiled
+
+def select(name):
+    '''
+    This method returns the JIT-compiled kernel to be used, or None for the NumPy implementation.
+
+    Args:
+        name: The name of the kernel (e.g. "dominated_loop").
+    '''
+
+    if backend == "numpy":
+        return None
+
+    kernels = jit()
+
+    if not kernels:
+        if backend == "numba":
+            raise ImportError("The numba backend of the kernels needs numba to be installed")
+        return None
+
+    return kernels[name]
+
+def points_array(points, objectives = None):
+    '''
+    This method returns a list or array of points as a contiguous (n x objectives) float64 array.
+    '''
+
+    points = np.ascontiguousarray(points, dtype = np.float64)
+
+    if objectives is not None:
+        points = points.reshape(-1, objectives)
+
+    return points
+
+def dominated(points, others, strict = False, block = None):
+    '''
+    This method checks, for each point, whether it is dominated by any of the other points (minimisation).
+
+    Args:
+        points: (n x objectives) array of points.
+        others: (m x objectives) array of points.
+        strict: When False a point equal to one of the others also counts as dominated.
+        block: The number of points compared at once by the NumPy implementation (block_size when None).
+
+    Returns:
+        Boolean array of length n.
+    '''
+
+    result = np.zeros(len(points), dtype = bool)
+
+    if len(points) == 0 or len(others) == 0:
+        return result
+
+    if block is None:
+        block = block_size
+
+    kernel = select("dominated_loop")
+
+    if kernel is not None:
+        points = points_array(points)
+        # The others are converted block by block, so a memory-mapped array is not loaded at once
+        for start in range(0, len(others), block):
+            kernel(points, points_array(others[start:start + block]), strict, result)
+        return result
+
+    for start in range(0, len(others), block):
+        chunk = others[start:start + block]
+        weakly = (chunk[None, :, :] <= points[:, None, :]).all(axis = 2)
+        if strict:
+            weakly = weakly & (chunk[None, :, :] < points[:, None, :]).any(axis = 2)
+        result = result | weakly.any(axis = 1)
+
+    return result
+
+def frontier(points):
+    '''
+    This method selects the points kept by the frontier heuristic of pareto.pareto_frontier_multi: in the given order,
+    a point is kept when it is better in at least one objective than the last kept point.
+
+    Args:
+        points: (n x objectives) array of points, already sorted.
+
+    Returns:
+        Boolean array of length n with the kept points.
+    '''
+
+    keep = np.zeros(len(points), dtype = bool)
+
+    if len(points) == 0:
+        return keep
+
+    kernel = select("frontier_loop")
+
+    if kernel is not None:
+        kernel(points_array(points), keep)
+        return keep
+
+    last = points[0]
+    keep[0] = True
+
+    for i in range(1, len(points)):
+        if (points[i] < last).any():
+            keep[i] = True
+            last = points[i]
+
+    return keep
+
+def distances(front, reference):
+    '''
+    This method calculates the euclidean distance of every point of a front to its nearest point of a reference set.
+
+    Args:
+        front: (n x objectives) array of points.
+        reference: (m x objectives) array of points.
+
+    Returns:
+        Array of length n with the distances (10000000 when the reference set is empty).
+    '''
+
+    front = points_array(front)
+    reference = points_array(reference, front.shape[1])
+    result = np.full(len(front), 10000000.0)
+
+    kernel = select("distances_loop")
+
+    if kernel is not None:
+        kernel(front, reference, result)
+        return result
+
+    for start in range(0, len(reference), block_size):
+        chunk = reference[start:start + block_size]
+        for first in range(0, len(front), block_size):
+            rows = front[first:first + block_size]
+            nearest = np.sqrt(((rows[:, None, :] - chunk[None, :, :]) ** 2).sum(axis = 2)).min(axis = 1)
+            result[first:first + block_size] = np.minimum(result[first:first + block_size], nearest)
+
+    return result
+
+def hypervolume(points, referencePoint):
+    '''
+    This method calculates the hypervolume dominated by a front and bounded by a reference point (minimisation).
+    The NumPy backend is hv.HyperVolume, which also serves the fronts that do not have three objectives.
+
+    Args:
+        points: List or array of the points of the front.
+        referencePoint: The reference point.
+
+    Returns:
+        The hypervolume.
+    '''
+
+    kernel = None
+    if len(referencePoint) == 3:
+        kernel = select("hypervolume_loop")
+
+    if kernel is None:
+        return HyperVolume(list(referencePoint)).compute(list(points))
+
+    points = points_array(points, 3)
+    referencePoint = points_array(referencePoint)
+
+    return kernel(np.ascontiguousarray(points[(points <= referencePoint).all(axis = 1)]), referencePoint)
@@ -4,13 +4,10 @@
 
 import csv
 import numpy as np
-import scipy as sp
-import matplotlib.pyplot as plt
-import matplotlib.lines as lines
 from os import listdir
 from os.path import isfile, join, exists
-import tests
 import utils
+import experiment
 
 #
 # Visualisation Parameters
@@ -18,8 +15,14 @@ import utils
 indicators = 4                                          # Number of performance assessment indicators
 indicators_names = ['Hypervolume Indicator ($I_{HV}$)', 'Generational Distance ($I_{GD}$)', 'Spread Indicator ($\Delta$)', 'Cardinality ($I_{C}$)']
 digits = 3                                              # Number of digits for rounding the results
-objectives = 3   
+objectives = len(experiment.front_schema)               # Number of optimisation objectives (see experiment.front_schema)
 colors = ['blue', 'red', 'cyan', 'lightgreen', 'lightblue']
 markers = ['.', 'x', '.', 'x']
 linestyle = ['bo-', 'rx-', 'co-', 'gx-']
-output_folder = "output/"
\ No newline at end of file
+output_folder = "output/"
+#
+# Performance Parameters
+#
+import_budget = 0.5                                     # Maximum import time (in seconds) of a table-only run (see check_import_time.py)
+processes = 1                                           # Number of worker processes of the experiments (None for all the available cores,
+                                                        # only with the fork start method, as the scripts have no __main__ guard)
@@ -1,18 +1,33 @@
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 import random
 import csv
-import matplotlib.lines as lines
-import fnmatch
+import multiprocessing
 import os
+import shutil
+import tempfile
 from os import listdir
 from os.path import isfile, join
-from mayavi import mlab
-from pylab import *
 import numpy as np
 from os import listdir
 from os.path import isfile, join, exists
 import utils
+import experiment
+import kernels
+
+# Global Variables
+reference_version = 1   # Version of the stored reference artifacts, increased whenever the way they are calculated changes
+method = "frontier"     # How the reference data are calculated: "frontier" (pareto_frontier_multi over all the runs), or exactly non-dominated
+                        # with "incremental" (persistent archives that absorb new runs), "mapreduce" (per-run fronts filtered and merged in parallel)
+                        # or "outofcore" (per-run fronts filtered into memory-bounded shards on disk and merged externally)
+processes = 1           # Number of worker processes of the "mapreduce" method (None for all the available cores)
+incremental = False     # Deprecated alias: True selects method = "incremental"
+block_size = 1024       # Number of points compared at once by the vectorised dominance checks
+shard_points = 1000000  # Maximum number of points gathered in memory before the "outofcore" method spills a shard to disk
+spill_folder = None     # Folder of the shards of the "outofcore" method (None for the temporary folder of the system)
+verify_outofcore = False    # When True the "outofcore" result is checked against the in-memory "mapreduce" result
+thinning = None         # Optional thinning of the referenceSet returned by initialise: "epsilon" (one point per non-dominated epsilon-box),
+                        # "farthest" (farthest-point sampling of thinning_size points), or None for the full referenceSet
+thinning_size = 1000    # Number of points kept by the "farthest" thinning
+thinning_epsilon = 0.01 # Side of the boxes of the "epsilon" thinning, as a fraction of the range of each objective
 
 def pareto_frontier(Xs, Ys, maxX = False, maxY = False):
     '''
@@ -59,17 +74,373 @@ def pareto_frontier_multi(myArray):
     
     # Sort on first dimension
     myArray = myArray[myArray[:,0].argsort()]
-    # Add first row to pareto_frontier
-    pareto_frontier = myArray[0:1,:]
-    # Test next row against the last row in pareto_frontier
-    for row in myArray[1:,:]:
-        if sum([row[x] < pareto_frontier[-1][x]
-                for x in range(len(row))]) >= 1:
-            # If it is better on all features add the row to pareto_frontier
-            pareto_frontier = np.concatenate((pareto_frontier, [row]))
+    # Keep the first row, and every next row that is better than the last kept row in at least one feature (see kernels.frontier)
+    pareto_frontier = myArray[kernels.frontier(myArray)]
     return pareto_frontier
 
 
+def dominated(points, others, strict = False):
+    '''
+    This method checks, for each point, whether it is dominated by any of the other points (minimisation).
+    
+    Args:
+        points: (n x objectives) array of points.
+        others: (m x objectives) array of points.
+        strict: When False a point equal to one of the others also counts as dominated.
+    
+    Returns:
+        Boolean array of length n.
+    '''
+    
+    return kernels.dominated(points, others, strict, block_size)
+
+def non_dominated(points):
+    '''
+    This method finds the non-dominated points of an array (minimisation), keeping a single copy of duplicate points.
+    The points are filtered with a ParetoArchive, whose NDTree only compares each point with a small part of the survivors.
+    
+    Args:
+        points: (n x objectives) array of points.
+    
+    Returns:
+        Array with the non-dominated points, in lexicographic order.
+    '''
+    
+    points = np.asarray(points, dtype = float)
+    
+    archive = ParetoArchive(points.shape[1])
+    archive.insert(points)
+    front = archive.array()
+    
+    return front[np.lexsort(front.T[::-1])]
+
+def weakly_dominates(a, b):
+    '''
+    This method checks whether point a is at least as good as point b in every objective (minimisation).
+    '''
+    
+    for i in range(0, len(a)):
+        if a[i] > b[i]:
+            return False
+    return True
+
+class NDNode(object):
+    '''
+    A node of an NDTree. A leaf holds points, an internal node holds children, and both keep the 
+    (possibly loose) ideal and nadir bounds of the points below them.
+    '''
+    
+    __slots__ = ('points', 'children', 'ideal', 'nadir')
+    
+    def __init__(self, points = None):
+        self.points = points
+        self.children = None
+        self.ideal = None
+        self.nadir = None
+        if points:
+            self.ideal = list(points[0])
+            self.nadir = list(points[0])
+            for point in points[1:]:
+                self.widen(point)
+    
+    def widen(self, point):
+        '''
+        This method extends the ideal and nadir bounds of the node with a point.
+        '''
+        
+        ideal = self.ideal
+        nadir = self.nadir
+        for i in range(0, len(point)):
+            if point[i] < ideal[i]:
+                ideal[i] = point[i]
+            elif point[i] > nadir[i]:
+                nadir[i] = point[i]
+    
+    def empty(self):
+        '''
+        This method checks whether the node holds no points any more.
+        '''
+        
+        if self.children is None:
+            return not self.points
+        return not self.children
+
+class NDTree(object):
+    '''
+    A dynamic non-dominated archive (minimisation) organised as an ND-tree (Jaszkiewicz and Lust, 2018).
+    
+    Every node keeps the ideal and nadir bounds of its points. A new point is rejected as soon as the nadir of a node 
+    weakly dominates it, it removes a whole node when it weakly dominates the node's ideal, and the nodes whose bounds 
+    are incomparable with it are skipped, so a dominance check only visits a small part of the archive on average.
+    New points are inserted into the child with the closest midpoint and full leaves are split into clusters.
+    '''
+    
+    def __init__(self, objectives = 3, leaf_size = 20, branches = None):
+        self.objectives = objectives
+        self.leaf_size = leaf_size
+        self.branches = branches if branches is not None else objectives + 1
+        self.root = None
+        self.size = 0
+    
+    def __len__(self):
+        return self.size
+    
+    def dominated(self, point, node = None):
+        '''
+        This method checks whether a point is weakly dominated by (or equal to) a point of the archive.
+        '''
+        
+        if node is None:
+            node = self.root
+            if node is None:
+                return False
+        
+        if weakly_dominates(node.nadir, point):
+            return True
+        
+        if not weakly_dominates(node.ideal, point):
+            return False
+        
+        if node.children is None:
+            for other in node.points:
+                if weakly_dominates(other, point):
+                    return True
+            return False
+        
+        for child in node.children:
+            if self.dominated(point, child):
+                return True
+        
+        return False
+    
+    def insert(self, point):
+        '''
+        This method inserts a point, unless it is weakly dominated by the archive, and removes the points it dominates.
+        
+        Args:
+            point: The objective vector.
+        
+        Returns:
+            True if the point has been added to the archive, False otherwise.
+        '''
+        
+        point = tuple([float(value) for value in point])
+        
+        if self.root is None:
+            self.root = NDNode([point])
+            self.size = 1
+            return True
+        
+        if self.prune(self.root, point):
+            return False
+        
+        if self.root.empty():
+            self.root = NDNode([point])
+            self.size = 1
+            return True
+        
+        self.add(self.root, point)
+        self.size = self.size + 1
+        return True
+    
+    def prune(self, node, point):
+        '''
+        This method removes the points of a node that are dominated by a new point.
+        
+        Returns:
+            True if the new point is weakly dominated by a point of the node (nothing is removed then).
+        '''
+        
+        if weakly_dominates(node.nadir, point):
+            return True
+        
+        if weakly_dominates(point, node.ideal):
+            # The new point dominates the whole node
+            self.size = self.size - self.count(node)
+            node.points = []
+            node.children = None
+            return False
+        
+        if not (weakly_dominates(node.ideal, point) or weakly_dominates(point, node.nadir)):
+            return False
+        
+        if node.children is None:
+            kept = []
+            for other in node.points:
+                if weakly_dominates(other, point):
+                    return True
+                if not weakly_dominates(point, other):
+                    kept.append(other)
+            self.size = self.size - (len(node.points) - len(kept))
+            node.points = kept
+            return False
+        
+        for child in node.children:
+            if self.prune(child, point):
+                return True
+        
+        node.children = [child for child in node.children if not child.empty()]
+        
+        # An internal node with a single child is replaced by it
+        if len(node.children) == 1:
+            child = node.children[0]
+            node.points = child.points
+            node.children = child.children
+        
+        return False
+    
+    def count(self, node):
+        '''
+        This method returns the number of points below a node.
+        '''
+        
+        if node.children is None:
+            return len(node.points)
+        return sum([self.count(child) for child in node.children])
+    
+    def add(self, node, point):
+        '''
+        This method adds a non-dominated point below a node, splitting the leaf that receives it when it is full.
+        '''
+        
+        while True:
+            if node.ideal is None:
+                node.ideal = list(point)
+                node.nadir = list(point)
+            else:
+                node.widen(point)
+            
+            if node.children is None:
+                node.points.append(point)
+                if len(node.points) > self.leaf_size:
+                    self.split(node)
+                return
+            
+            node = min(node.children, key = lambda child: self.distance(child, point))
+    
+    def distance(self, node, point):
+        '''
+        This method returns the squared distance between a point and the midpoint of the bounds of a node.
+        '''
+        
+        total = 0.0
+        for i in range(0, len(point)):
+            difference = point[i] - (node.ideal[i] + node.nadir[i]) / 2.0
+            total = total + difference * difference
+        return total
+    
+    def split(self, node):
+        '''
+        This method turns a full leaf into an internal node whose children are clusters of its points.
+        The seeds of the clusters are chosen far from each other, and every other point joins the closest cluster.
+        '''
+        
+        points = np.asarray(node.points)
+        centre = points.mean(axis = 0)
+        seeds = [int(((points - centre) ** 2).sum(axis = 1).argmax())]
+        closest = ((points - points[seeds[0]]) ** 2).sum(axis = 1)
+        
+        while len(seeds) < min(self.branches, len(points)):
+            seeds.append(int(closest.argmax()))
+            closest = np.minimum(closest, ((points - points[seeds[-1]]) ** 2).sum(axis = 1))
+        
+        children = [NDNode([node.points[seed]]) for seed in seeds]
+        for (index, point) in enumerate(node.points):
+            if index not in seeds:
+                self.add(min(children, key = lambda child: self.distance(child, point)), point)
+        
+        node.points = None
+        node.children = children
+    
+    def extend(self, points):
+        '''
+        This method inserts a batch of points. The points are inserted in increasing order of the sum of their
+        objectives, so that none of them can dominate a point inserted before it.
+        
+        Args:
+            points: (n x objectives) array of points.
+        
+        Returns:
+            The number of points added to the archive.
+        '''
+        
+        points = np.asarray(points, dtype = float).reshape(-1, self.objectives)
+        points = points[np.argsort(points.sum(axis = 1), kind = 'mergesort')]
+        
+        added = 0
+        for point in points.tolist():
+            if self.insert(point):
+                added = added + 1
+        
+        return added
+    
+    def array(self):
+        '''
+        This method exports the points of the archive.
+        
+        Returns:
+            (size x objectives) array with the points.
+        '''
+        
+        points = []
+        nodes = [self.root] if self.root is not None else []
+        
+        while nodes:
+            node = nodes.pop()
+            if node.children is None:
+                points.extend(node.points)
+            else:
+                nodes.extend(node.children)
+        
+        return np.asarray(points, dtype = float).reshape(-1, self.objectives)
+
+class ParetoArchive(object):
+    '''
+    A set of mutually non-dominated points (minimisation) that absorbs new points incrementally:
+    a new point is only kept if no archived point dominates it, and it evicts the archived points it dominates.
+    The points are kept in an NDTree.
+    '''
+    
+    def __init__(self, objectives = 3):
+        self.tree = NDTree(objectives)
+    
+    def __len__(self):
+        return len(self.tree)
+    
+    def insert(self, points):
+        '''
+        This method inserts a batch of points into the archive.
+        
+        Args:
+            points: (n x objectives) array of points.
+        
+        Returns:
+            The number of inserted points that are kept in the archive.
+        '''
+        
+        return self.tree.extend(points)
+    
+    def array(self):
+        '''
+        This method returns the archived points as an array.
+        '''
+        
+        return self.tree.array()
+    
+    def minimum(self):
+        '''
+        This method returns the best value of each objective over the archive.
+        '''
+        
+        return self.array().min(axis = 0)
+    
+    def maximum(self):
+        '''
+        This method returns the worst value of each objective over the archive.
+        '''
+        
+        return self.array().max(axis = 0)
+
 def initialise(start_run, end_run, model, functions, algorithms, folder):
     '''
     This method is the first step for calculating the results of an experiment.
@@ -91,6 +462,198 @@ def initialise(start_run, end_run, model, functions, algorithms, folder):
         referenceSet: Normalised reference set according to the reference point.
     '''
 
+    [referencePoint, utopiaPoint, referenceSet] = experiment.load(folder, model).reference(start_run, end_run, functions, algorithms)
+
+    if thinning is not None:
+        size = len(referenceSet)
+        (referenceSet, error) = thin_reference(referenceSet, thinning)
+        print("referenceSet thinned from " + str(size) + " to " + str(len(referenceSet)) + " points, GD error <= " + str(error))
+
+    return [referencePoint, utopiaPoint, referenceSet]
+
+def thin_reference(referenceSet, how = "farthest"):
+    '''
+    This method reduces the referenceSet, so every GD calculation compares the fronts with fewer points.
+    
+    The error introduced on GD is bounded by the largest distance of a dropped point from the kept points (h):
+    every distance of a front point to the reference set grows by at most h, so the GD of a front of n points
+    grows by at most h / sqrt(n) <= h (and never decreases).
+    
+    Args:
+        referenceSet: The normalised reference set.
+        how: "farthest" for the farthest-point sampling of thinning_size points,
+             or "epsilon" for one point per non-dominated box of side thinning_epsilon (relative to the range of each objective).
+    
+    Returns:
+        A pair of the thinned reference set (array) and the error bound h.
+    '''
+    
+    points = np.asarray(referenceSet, dtype = float)
+    
+    if len(points) == 0:
+        return (points, 0.0)
+    
+    if how == "epsilon":
+        span = points.max(axis = 0) - points.min(axis = 0)
+        span[span == 0] = 1
+        boxes = np.floor((points - points.min(axis = 0)) / (thinning_epsilon * span))
+        
+        # The point closest to the lower corner of its box represents the box
+        corner = np.sqrt((((points - points.min(axis = 0)) / (thinning_epsilon * span) - boxes) ** 2).sum(axis = 1))
+        order = np.lexsort([corner] + list(boxes.T[::-1]))
+        first = np.ones(len(order), dtype = bool)
+        first[1:] = (boxes[order][1:] != boxes[order][:-1]).any(axis = 1)
+        kept = order[first]
+        
+        # Keep the boxes that are not dominated by another box
+        kept = kept[~dominated(boxes[kept], boxes[kept], strict = True)]
+    elif how == "farthest":
+        # Start from the extreme points of every objective, then repeatedly add the point farthest from the kept ones
+        kept = list(np.unique(np.concatenate([points.argmin(axis = 0), points.argmax(axis = 0)])))
+        distances = np.full(len(points), np.inf)
+        for i in kept:
+            distances = np.minimum(distances, np.sqrt(((points - points[i]) ** 2).sum(axis = 1)))
+        while len(kept) < min(thinning_size, len(points)):
+            i = int(distances.argmax())
+            kept.append(i)
+            distances = np.minimum(distances, np.sqrt(((points - points[i]) ** 2).sum(axis = 1)))
+        kept = np.sort(kept)
+    else:
+        raise ValueError("Unknown thinning of the reference set: " + str(how))
+    
+    return (points[kept], thinning_error(points, points[kept]))
+
+def thinning_error(points, kept):
+    '''
+    This method calculates the largest distance of a point of the reference set from the points kept by the thinning.
+    '''
+    
+    error = 0.0
+    
+    for start in range(0, len(points), block_size):
+        block = points[start:start + block_size]
+        nearest = np.sqrt(((block[:, None, :] - kept[None, :, :]) ** 2).sum(axis = 2)).min(axis = 1)
+        error = max(error, float(nearest.max()))
+    
+    return error
+
+def reference_method():
+    '''
+    This method returns the method that calculates the reference data, honouring the deprecated incremental switch.
+    '''
+    
+    if incremental:
+        return "incremental"
+    
+    return method
+
+def reference_provenance(start_run, end_run, model, functions, algorithms, folder):
+    '''
+    This method describes the inputs of the reference data of a set of runs: the runs, functions and algorithms,
+    and the fingerprints of the final generation files that the reference data are calculated from.
+    
+    Args:
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        functions: The fitness function(s) used in the experiments (Expensive or Surrogate).
+        algorithms: The optimisation algorithm used (Random Search or MOEA).
+        folder: The folder of the experiments.
+    
+    Returns:
+        A dictionary with the provenance of the reference data.
+    '''
+    
+    data = experiment.load(folder, model)
+    fingerprints = []
+    
+    for algorithm in algorithms:
+        for function in functions:
+            runset = data.runset(function, algorithm)
+            for run in range(start_run, end_run + 1):
+                fingerprints.extend(final_fingerprints(runset, run))
+    
+    return {'version': reference_version,
+            'method': reference_method(),
+            'model': model,
+            'runs': (start_run, end_run),
+            'functions': [str(function) for function in functions],
+            'algorithms': [str(algorithm) for algorithm in algorithms],
+            'fingerprints': fingerprints}
+
+def final_fingerprints(runset, run):
+    '''
+    This method returns the fingerprints of the final generation Pareto and QoSMetrics files of a run (None for a missing directory).
+    '''
+    
+    generation = runset.final_generation(run)
+    fingerprints = []
+    
+    for dir_name in [runset.path(run) + "Pareto/Generation" + str(generation) + "/", runset.path(run) + "QoSMetrics/Generation" + str(generation) + "/"]:
+        if utils.path_exists(dir_name):
+            fingerprints.append(utils.fingerprint(dir_name, utils.list_files(dir_name)))
+        else:
+            fingerprints.append(None)
+    
+    return fingerprints
+
+def reference_artifact(start_run, end_run, model, functions, algorithms, folder):
+    '''
+    This method returns the reference data of a set of runs as a versioned artifact.
+    The artifact is stored in the cache of the experiments folder, so every experiment using the same runs shares it, 
+    and it is only recalculated when its version or one of the final generation files changes.
+    
+    Args:
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        functions: The fitness function(s) used in the experiments (Expensive or Surrogate).
+        algorithms: The optimisation algorithm used (Random Search or MOEA).
+        folder: The folder of the experiments.
+    
+    Returns:
+        A dictionary with the provenance, the referencePoint, the utopiaPoint and the normalised referenceSet.
+    '''
+    
+    provenance = reference_provenance(start_run, end_run, model, functions, algorithms, folder)
+    name = "reference_v" + str(reference_version) + "_" + provenance['method'] + "_" + str(model) + "_" + str(start_run) + "_" + str(end_run) + "_" + "-".join(provenance['functions']) + "_" + "-".join(provenance['algorithms'])
+    
+    artifact = utils.load_cache(folder, name, provenance)
+    
+    if artifact is None:
+        if reference_method() == "incremental":
+            [referencePoint, utopiaPoint, referenceSet] = incremental_reference(start_run, end_run, model, functions, algorithms, folder)
+        elif reference_method() == "mapreduce":
+            [referencePoint, utopiaPoint, referenceSet] = mapreduce_reference(start_run, end_run, model, functions, algorithms, folder)
+        elif reference_method() == "outofcore":
+            [referencePoint, utopiaPoint, referenceSet] = outofcore_reference(start_run, end_run, model, functions, algorithms, folder)
+        else:
+            [referencePoint, utopiaPoint, referenceSet] = build_reference(start_run, end_run, model, functions, algorithms, folder)
+        artifact = {'provenance': provenance,
+                    'referencePoint': referencePoint,
+                    'utopiaPoint': utopiaPoint,
+                    'referenceSet': referenceSet}
+        utils.store_cache(folder, name, provenance, artifact)
+    
+    return artifact
+
+def build_reference(start_run, end_run, model, functions, algorithms, folder):
+    '''
+    This method calculates the referencePoint, utopiaPoint, and referenceSet of a set of runs
+    (see initialise and reference_artifact, which memoise and store the results).
+    
+    Args:
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        functions: The fitness function(s) used in the experiments (Expensive or Surrogate).
+        algorithms: The optimisation algorithm used (Random Search or MOEA).
+        folder: The folder of the experiments.
+    
+    Returns:
+        A list of the referencePoint, utopiaPoint, and normalised referenceSet.
+    '''
+
     # Reference Point (RP)
     referencePoint = reference_point(start_run, end_run, model, functions, algorithms, folder)
     #print("Reference_point values = ", referencePoint)
@@ -104,11 +667,304 @@ def initialise(start_run, end_run, model, functions, algorithms, folder):
 
     # Normalise RS with the RP
     for i in range(0, len(referenceSet)):
-        for j in range(0, 3):
+        for j in range(0, len(referencePoint)):
             referenceSet[i][j] = referenceSet[i][j] / referencePoint[j]
             
     return [referencePoint, utopiaPoint, referenceSet]
 
+def incremental_reference(start_run, end_run, model, functions, algorithms, folder):
+    '''
+    This method calculates the referencePoint, utopiaPoint, and referenceSet of a set of runs from persistent 
+    non-dominated archives of the final generation QoS metrics and Pareto fronts. There is one archive per function
+    and algorithm, stored in the cache of the experiments folder, which only absorbs the runs that it does not contain yet,
+    so adding runs costs time in proportion to the added runs, and experiments selecting other runs, functions or
+    algorithms of the same folder leave the archives of each other alone.
+    
+    The archives also keep the non-dominated subset of each of their runs, so a changed run is replaced, and a selection
+    of some of the runs of an archive is merged, without reading the other runs again.
+    
+    The referencePoint and utopiaPoint are the worst and best values of the non-dominated QoS metrics, and the 
+    referenceSet is the non-dominated set of the fronts, normalised as in build_reference (see exact_reference).
+    
+    Args:
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        functions: The fitness function(s) used in the experiments (Expensive or Surrogate).
+        algorithms: The optimisation algorithm used (Random Search or MOEA).
+        folder: The folder of the experiments.
+    
+    Returns:
+        A list of the referencePoint, utopiaPoint, and normalised referenceSet.
+    '''
+    
+    data = experiment.load(folder, model)
+    qos = ParetoArchive(len(experiment.qos_schema))
+    fronts = ParetoArchive(len(experiment.front_schema))
+    
+    for algorithm in algorithms:
+        for function in functions:
+            state = function_archive(data.runset(function, algorithm), start_run, end_run, folder)
+            if all([start_run <= run <= end_run for run in state['runs']]):
+                qos.insert(state['qos'].array())
+                fronts.insert(state['fronts'].array())
+            else:
+                for run in range(start_run, end_run + 1):
+                    qos.insert(state['runs'][run][0])
+                    fronts.insert(state['runs'][run][1])
+    
+    return exact_reference(qos.array(), fronts.array())
+
+def function_archive(runset, start_run, end_run, folder):
+    '''
+    This method updates the persistent non-dominated archives of the final generation QoS metrics and Pareto fronts
+    of the runs of a function and algorithm (see incremental_reference) with a set of runs.
+    
+    Args:
+        runset: The experiment.RunSet of the function and algorithm.
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        folder: The folder of the experiments.
+    
+    Returns:
+        A dictionary with the fingerprints of the archived runs ('items'), the non-dominated (QoS metrics, Pareto front)
+        subsets of each run ('runs'), and the ParetoArchives of all the archived runs ('qos' and 'fronts').
+    '''
+    
+    name = "reference_archive_" + str(runset.experiment.model) + "_" + str(runset.function) + "_" + str(runset.algorithm)
+    state = utils.load_cache(folder, name, reference_version)
+    
+    if state is None:
+        state = {'items': {}, 'runs': {}}
+    
+    items = dict([(run, final_fingerprints(runset, run)) for run in range(start_run, end_run + 1)])
+    changed = [run for run in items if run in state['items'] and state['items'][run] != items[run]]
+    new = sorted([run for run in items if state['items'].get(run) != items[run]])
+    
+    if changed or 'qos' not in state:
+        # Points cannot be removed from the archives, so they are rebuilt from the subsets of the unchanged runs
+        state['qos'] = ParetoArchive(len(experiment.qos_schema))
+        state['fronts'] = ParetoArchive(len(experiment.front_schema))
+        for run in sorted(state['runs']):
+            if run not in changed:
+                state['qos'].insert(state['runs'][run][0])
+                state['fronts'].insert(state['runs'][run][1])
+    
+    for run in new:
+        subsets = []
+        for (values, schema) in [(runset.qos(run), experiment.qos_schema), (runset.front(run), experiment.front_schema)]:
+            archive = ParetoArchive(len(schema))
+            if values is not None:
+                archive.insert(values)
+            subsets.append(archive.array())
+        state['qos'].insert(subsets[0])
+        state['fronts'].insert(subsets[1])
+        state['runs'][run] = tuple(subsets)
+        state['items'][run] = items[run]
+    
+    if new:
+        utils.store_cache(folder, name, reference_version, state)
+    
+    return state
+
+def exact_reference(qos, front):
+    '''
+    This method calculates the referencePoint, utopiaPoint, and referenceSet from the exactly non-dominated 
+    QoS metrics and Pareto front points of a set of runs.
+    
+    Args:
+        qos: Array with the non-dominated QoS vectors (see experiment.qos_schema).
+        front: Array with the non-dominated objective vectors (see experiment.front_schema).
+    
+    Returns:
+        A list of the referencePoint, utopiaPoint, and normalised referenceSet.
+    '''
+    
+    referencePoint = np.maximum(qos.max(axis = 0), 0).tolist()
+    utopiaPoint = np.minimum(qos.min(axis = 0), 10000).tolist()
+    
+    # Normalise the objective vectors based on the utopia and the reference point, and then with the RP as build_reference does
+    referenceSet = (front - np.asarray(utopiaPoint)) / (np.asarray(referencePoint) - np.asarray(utopiaPoint))
+    referenceSet = referenceSet / np.asarray(referencePoint)
+    
+    return [referencePoint, utopiaPoint, referenceSet]
+
+def local_fronts(arguments):
+    '''
+    This method reads the final generation of a run and filters its QoS metrics and Pareto front to their 
+    non-dominated subsets (the map step of mapreduce_reference). Nothing is memoised, so a worker process
+    only holds one run at a time.
+    
+    Args:
+        arguments: A tuple (folder, model, function, algorithm, run) identifying the run.
+    
+    Returns:
+        A pair of arrays with the non-dominated QoS metrics and Pareto front points of the run.
+    '''
+    
+    (folder, model, function, algorithm, run) = arguments
+    
+    runset = experiment.load(folder, model).runset(function, algorithm)
+    generation = utils.find_final_generation(run, model, function, algorithm, folder)
+    
+    qos = runset.load_qos(run, generation)
+    front = runset.load_front(run, generation)[0]
+    
+    if qos is None:
+        qos = experiment.qos_schema.empty()
+    if front is None:
+        front = experiment.front_schema.empty()
+    
+    return (non_dominated(qos), non_dominated(front))
+
+def merge_fronts(arguments):
+    '''
+    This method merges two pairs of non-dominated (QoS metrics, Pareto front) subsets (the reduce step of mapreduce_reference).
+    '''
+    
+    (first, second) = arguments
+    
+    return (non_dominated(np.concatenate([first[0], second[0]])), non_dominated(np.concatenate([first[1], second[1]])))
+
+def mapreduce_reference(start_run, end_run, model, functions, algorithms, folder):
+    '''
+    This method calculates the referencePoint, utopiaPoint, and referenceSet of a set of runs with map-reduce:
+    the final generation of every run is filtered to its non-dominated subset in a pool of worker processes, 
+    and the subsets are then merged pairwise, level by level, in the same pool (tree reduction). 
+    Only non-dominated subsets travel between the processes, which bounds both the memory and the time.
+    
+    Args:
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        functions: The fitness function(s) used in the experiments (Expensive or Surrogate).
+        algorithms: The optimisation algorithm used (Random Search or MOEA).
+        folder: The folder of the experiments.
+    
+    Returns:
+        A list of the referencePoint, utopiaPoint, and normalised referenceSet (see exact_reference).
+    '''
+    
+    items = [(folder, model, str(function), str(algorithm), run) for algorithm in algorithms for function in functions for run in range(start_run, end_run + 1)]
+    
+    # A single pool serves the map step and every level of the reduction
+    pool = None
+    if processes != 1 and len(items) > 1:
+        pool = multiprocessing.Pool(processes)
+    
+    try:
+        subsets = utils.parallel_map(local_fronts, items, processes, pool)
+        
+        while len(subsets) > 1:
+            pairs = [(subsets[i], subsets[i + 1]) for i in range(0, len(subsets) - 1, 2)]
+            merged = utils.parallel_map(merge_fronts, pairs, processes, pool)
+            if len(subsets) % 2 == 1:
+                merged.append(subsets[-1])
+            subsets = merged
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    
+    return exact_reference(subsets[0][0], subsets[0][1])
+
+def spill_shard(subsets, filename):
+    '''
+    This method writes the non-dominated subset of a (non-empty) list of point arrays to a binary (.npy) file.
+    
+    Returns:
+        The name of the file.
+    '''
+    
+    np.save(filename, non_dominated(np.concatenate(subsets)))
+    return filename
+
+def external_non_dominated(shards):
+    '''
+    This method merges the non-dominated subsets stored in a list of shard files into their common non-dominated set.
+    Every shard is filtered against the other shards, which are memory-mapped and compared block by block,
+    so only one shard is held in memory at a time (besides the result).
+    A point equal to a point of an earlier shard is dropped, so every point is kept once, as in non_dominated.
+    
+    Args:
+        shards: List of the .npy files with the non-dominated subsets.
+    
+    Returns:
+        Array with the non-dominated points, in lexicographic order as returned by non_dominated.
+    '''
+    
+    fronts = []
+    
+    for i in range(0, len(shards)):
+        points = np.load(shards[i])
+        keep = np.ones(len(points), dtype = bool)
+        
+        for j in range(0, len(shards)):
+            if j == i or not keep.any():
+                continue
+            others = np.load(shards[j], mmap_mode = 'r')
+            keep[keep] = ~dominated(points[keep], others, strict = j > i)
+        
+        fronts.append(points[keep])
+    
+    front = np.concatenate(fronts)
+    
+    return front[np.lexsort(front.T[::-1])]
+
+def outofcore_reference(start_run, end_run, model, functions, algorithms, folder):
+    '''
+    This method calculates the referencePoint, utopiaPoint, and referenceSet of a set of runs whose points do not fit in memory.
+    The final generation of every run is filtered to its non-dominated subset (see local_fronts) one run at a time, 
+    and the subsets are gathered into shards of at most shard_points points, which are filtered again and spilled 
+    to disk as binary arrays. The shards are then merged externally (see external_non_dominated).
+    The result is the same as the one of mapreduce_reference, which is checked when verify_outofcore is True.
+    
+    Args:
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        model: The composition model used for the experiments (Centralised or Decentralised).
+        functions: The fitness function(s) used in the experiments (Expensive or Surrogate).
+        algorithms: The optimisation algorithm used (Random Search or MOEA).
+        folder: The folder of the experiments.
+    
+    Returns:
+        A list of the referencePoint, utopiaPoint, and normalised referenceSet (see exact_reference).
+    '''
+    
+    items = [(folder, model, str(function), str(algorithm), run) for algorithm in algorithms for function in functions for run in range(start_run, end_run + 1)]
+    directory = tempfile.mkdtemp(prefix = "reference", dir = spill_folder)
+    
+    try:
+        # The shards and the points not spilled yet of the QoS metrics (0) and of the Pareto fronts (1)
+        schemas = [experiment.qos_schema, experiment.front_schema]
+        shards = [[], []]
+        buffers = [[schema.empty()] for schema in schemas]
+        
+        for subsets in utils.prefetch_map(local_fronts, items, 1):
+            for k in range(0, 2):
+                buffers[k].append(subsets[k])
+                if sum([len(points) for points in buffers[k]]) >= shard_points:
+                    shards[k].append(spill_shard(buffers[k], os.path.join(directory, str(k) + "_" + str(len(shards[k])) + ".npy")))
+                    buffers[k] = [schemas[k].empty()]
+        
+        for k in range(0, 2):
+            if len(buffers[k]) > 1 or not shards[k]:
+                shards[k].append(spill_shard(buffers[k], os.path.join(directory, str(k) + "_" + str(len(shards[k])) + ".npy")))
+        
+        qos = external_non_dominated(shards[0])
+        front = external_non_dominated(shards[1])
+    finally:
+        shutil.rmtree(directory, ignore_errors = True)
+    
+    reference = exact_reference(qos, front)
+    
+    if verify_outofcore:
+        expected = mapreduce_reference(start_run, end_run, model, functions, algorithms, folder)
+        if expected[0] != reference[0] or expected[1] != reference[1] or not np.array_equal(expected[2], reference[2]):
+            raise ValueError("The out-of-core reference data differ from the in-memory reference data")
+    
+    return reference
+
 def reference_set(start_run, end_run, model, functions, algorithms, referencePoint, utopiaPoint, folder): 
     '''
     This method finds the Pareto set also called Reference Set (RS) 
@@ -128,23 +984,10 @@ def reference_set(start_run, end_run, model, functions, algorithms, referencePoi
         referenceSet: The set of Pareto points of all the experimental executions.
     '''
     
-    front = []
-
-    for algorithm in algorithms:
-        for function in functions:
-            for run in range(start_run, end_run + 1):
-                final_generation = utils.find_final_generation(run, model, function, algorithm, folder)
-                dir_name = folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/Pareto/Generation" + str(final_generation) + "/"
-                ##print(dir_name) 
-                
-                if exists(dir_name):
-                    files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
-                    
-                    for file in files:
-                        csv_file = csv.DictReader(open(dir_name + file, 'rb'), delimiter=',', quotechar='"')
-                    
-                        for row in csv_file:
-                            front.append([(float(row['ResponseTime']) - utopiaPoint[0]) / (referencePoint[0] - utopiaPoint[0]), (float(row['NetworkLatency']) - utopiaPoint[1]) / (referencePoint[1] - utopiaPoint[1]),(float(row['Energy']) - utopiaPoint[2]) / (referencePoint[2] - utopiaPoint[2])])
+    front = experiment.load(folder, model).final_fronts(start_run, end_run, functions, algorithms)
+    
+    # Normalise the objective vectors based on the utopia and the reference point
+    front = (front - np.asarray(utopiaPoint, dtype = float)) / (np.asarray(referencePoint, dtype = float) - np.asarray(utopiaPoint, dtype = float))
 
     myArray = np.array(front)
     referenceSet = pareto_frontier_multi(myArray)
@@ -168,32 +1011,15 @@ def reference_point(start_run, end_run, model, functions, algorithms, folder):
         referencePoint: The worst possible Pareto solution of all the experimental executions.
     '''
     
-    front = []
+    front = experiment.load(folder, model).final_qos(start_run, end_run, functions, algorithms)
     
-    for algorithm in algorithms:
-        for function in functions:
-            for run in range(start_run, end_run + 1):
-                final_generation = utils.find_final_generation(run, model, function, algorithm, folder)
-                dir_name = folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/QoSMetrics/Generation" + str(final_generation) + "/"
-                #print(dir_name) 
-                
-                if exists(dir_name):
-                    files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
-                    
-                    for file in files:
-                        csv_file = csv.DictReader(open(dir_name + file, 'rb'), delimiter='	', quotechar='"')
-                        
-                        if file != 'population.csv':
-                            for row in csv_file:
-                                front.append([float(row['Delay2']), float(row['Energy']), 100 - float(row['Success_Ratio'])])                
-
     myArray = np.array(front)
     worst_front = pareto_frontier_multi(myArray)
 
     # Find the worst value for each objective
-    referencePoint = [0, 0, 0]
+    referencePoint = [0] * myArray.shape[1]
 
-    for i in range(0, 3):
+    for i in range(0, myArray.shape[1]):
         for j in range(0, len(worst_front)):
             if worst_front[j][i] > referencePoint[i]:
                 referencePoint[i] = worst_front[j][i]
@@ -216,34 +1042,17 @@ def utopia_point(start_run, end_run, model, functions, algorithms, folder):
         utopiaPoint: The best possible Pareto solution of all the experimental executions.
     '''
     
-    front = []
+    front = experiment.load(folder, model).final_qos(start_run, end_run, functions, algorithms)
     
-    for algorithm in algorithms:
-        for function in functions:
-            for run in range(start_run, end_run + 1):
-                final_generation = utils.find_final_generation(run, model, function, algorithm, folder)
-                dir_name = folder + str(run) + "/" + model + "/" + function + "/" + algorithm + "/QoSMetrics/Generation" + str(final_generation) + "/"
-                ##print(dir_name) 
-                
-                if exists(dir_name):
-                    files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
-                    
-                    for file in files:
-                        csv_file = csv.DictReader(open(dir_name + file, 'rb'), delimiter='	', quotechar='"')
-                        
-                        if file != 'population.csv':
-                            for row in csv_file:
-                                front.append([float(row['Delay2']), float(row['Energy']), 100 - float(row['Success_Ratio'])])                
-        
     print("initial front size = " , len(front))
     myArray = np.array(front)
     best_front = pareto_frontier_multi(myArray)
     print("front size = ", len(best_front))
 
     # Find the best value for each objective
-    utopiaPoint = [10000, 10000, 10000]
+    utopiaPoint = [10000] * myArray.shape[1]
 
-    for i in range(0, 3):
+    for i in range(0, myArray.shape[1]):
         for j in range(0, len(best_front)):
             if best_front[j][i] < utopiaPoint[i]:
                 utopiaPoint[i] = best_front[j][i]
@@ -0,0 +1,384 @@
+'''
+    Memory-budget-aware execution of the steps of an experiment.
+
+    The planner estimates the working set of a step from the directory index (the counts and sizes of the files,
+    and one sampled file per kind) without loading the data, and picks how the step runs under memory_budget:
+
+        in-memory:   all the data of the step are held at once, and the work is spread over as many worker processes as fit.
+        streaming:   one run (or generation) at a time, with bounded read-ahead buffers and mergeable sketches.
+        out-of-core: the intermediate results are spilled to disk in shards (reference data only, see pareto.outofcore_reference).
+
+    The planner never changes the results of a step: the reference data are only calculated out of core when the configured
+    pareto.method is exact (the out-of-core reference data equal the ones of the other exact methods), and a step that cannot
+    run within the budget with its configured method runs in memory with a warning.
+
+    Every step reports its plan, its estimated working set and its measured peak memory: the peak traced by tracemalloc
+    during the step, the peak RSS of the process during the step (Linux, where the peak can be reset) or over its lifetime,
+    and the peak RSS of the worker processes of the step when it exceeds the one of the earlier worker processes.
+
+    Example:
+        [referencePoint, utopiaPoint, referenceSet] = planner.initialise(start_run, end_run, model, functions, algorithms, folder)
+        table = planner.averageQoS(start_run, end_run, model, functions, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, folder, table)
+'''
+
+import multiprocessing
+import sys
+import warnings
+import numpy as np
+import estimating
+import experiment
+import pareto
+import utils
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Global Variables
+memory_budget = 4 * 1024 ** 3   # Bytes of memory that a step may use
+overhead = 3.0                  # Factor between the size of the loaded arrays and the memory needed for processing them
+list_overhead = 4.0             # Factor between the size of the arrays and of the same values in Python lists (averageQoS in memory)
+trace = True                    # When True the peak memory of every step is traced with tracemalloc (slows down the allocations)
+reports = []                    # The (step, plan, estimate, traced peak, RSS peak, workers RSS peak) reports of the executed steps
+
+class Estimate(object):
+    '''
+    The working set of a step, estimated from the directory index without reading the data.
+    '''
+
+    def __init__(self):
+        self.runs = 0           # Number of runs
+        self.files = 0          # Number of files of the final generations
+        self.generations = 0    # Largest final generation
+        self.run_bytes = 0      # Largest size of the arrays of the final generation of a run
+        self.final_bytes = 0    # Total size of the arrays of the final generations
+        self.all_bytes = 0      # Total size of the arrays of all the generations (assuming every generation is as large as the final one)
+
+    def __str__(self):
+        return (str(self.runs) + " runs, " + str(self.generations) + " generations, " + str(self.files) + " files, final generations = "
+                + megabytes(self.final_bytes) + ", all generations = " + megabytes(self.all_bytes))
+
+def megabytes(size):
+    '''
+    This method formats a number of bytes in MB.
+    '''
+
+    return str(round(size / (1024.0 * 1024.0), 1)) + " MB"
+
+def expansion(filename, schema):
+    '''
+    This method samples the ratio between the size of the arrays read from a file and the size of the file.
+
+    Args:
+        filename: The sampled file.
+        schema: The experiment.Schema of the file.
+
+    Returns:
+        The bytes of the arrays per byte of the file.
+    '''
+
+    source = utils.open_file(filename)
+    rows = len([line for line in source.read().splitlines()[1:] if line.strip()])
+    source.close()
+    size = utils.file_status(filename)[0]
+
+    return rows * len(schema) * 8.0 / max(size, 1)
+
+def estimate(runsets, start_run, end_run, kinds = ("Pareto", "QoSMetrics")):
+    '''
+    This method estimates the working set of the final generations (and of all the generations) of a set of runs.
+
+    Args:
+        runsets: The RunSets of the runs.
+        start_run: The first run number of the experiments.
+        end_run: The last run number of the experiments.
+        kinds: The directories of the files read by the step ("Pareto" and/or "QoSMetrics").
+
+    Returns:
+        The Estimate.
+    '''
+
+    result = Estimate()
+    ratios = {}
+
+    for runset in runsets:
+        for run in range(start_run, end_run + 1):
+            generation = runset.final_generation(run)
+            result.runs = result.runs + 1
+            result.generations = max(result.generations, generation)
+            run_bytes = 0
+
+            for (kind, schema) in [("Pareto", experiment.front_schema), ("QoSMetrics", experiment.qos_schema)]:
+                if kind not in kinds:
+                    continue
+                dir_name = runset.path(run) + kind + "/Generation" + str(generation) + "/"
+                if not utils.path_exists(dir_name):
+                    continue
+                files = [f for f in utils.list_files(dir_name) if f != 'population.csv']
+                if not files:
+                    continue
+                if kind not in ratios:
+                    ratios[kind] = expansion(dir_name + files[0], schema)
+                result.files = result.files + len(files)
+                run_bytes = run_bytes + ratios[kind] * sum([utils.file_status(dir_name + f)[0] for f in files])
+
+            result.run_bytes = max(result.run_bytes, run_bytes)
+            result.final_bytes = result.final_bytes + run_bytes
+            result.all_bytes = result.all_bytes + run_bytes * generation
+
+    return result
+
+def workers(unit, budget, shared = 0, processes = None):
+    '''
+    This method returns the number of worker processes whose working sets fit in the memory budget.
+
+    Args:
+        unit: The estimated bytes of the data processed at once by a worker.
+        budget: The memory budget in bytes.
+        shared: The estimated bytes held by every process besides its unit (e.g., the reference data).
+        processes: The largest number of worker processes (None for all the available cores).
+    '''
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    fit = int((budget - shared * overhead) // max(unit * overhead, 1))
+
+    return max(1, min(processes, fit))
+
+def plan(step, estimated, budget = None, shared = 0, processes = None):
+    '''
+    This method chooses how a step runs under a memory budget.
+
+    Args:
+        step: "initialise", "evolve" or "qos".
+        estimated: The Estimate of the step.
+        budget: The memory budget in bytes (memory_budget when None).
+        shared: The estimated bytes of the reference data, held by every process.
+        processes: The largest number of worker processes (None for all the available cores).
+
+    Returns:
+        A dictionary with the 'mode' ("in-memory", "streaming" or "out-of-core"), the number of 'workers',
+        and the settings of the mode ('method' and 'shard_points' of the reference data, 'depth' of the read-ahead).
+    '''
+
+    if budget is None:
+        budget = memory_budget
+
+    if step == "initialise":
+        # The reference data need the final generations of all the runs at once, or shards of them on disk
+        method = pareto.reference_method()
+        if estimated.final_bytes * overhead <= budget:
+            return {'mode': "in-memory", 'method': method, 'workers': workers(estimated.run_bytes, budget, 0, processes)}
+        if method == "frontier":
+            # The heuristic has no out-of-core equivalent, and the exact methods give a different reference set
+            warnings.warn("The reference data need about " + megabytes(estimated.final_bytes * overhead) + " with the configured \"frontier\" method, "
+                          + "over the memory budget of " + megabytes(budget) + "; set pareto.method to an exact method to calculate them out of core")
+            return {'mode': "in-memory", 'method': method, 'workers': 1}
+        # All the exact methods give the same reference data
+        points = int(budget // (overhead * 8 * max(len(experiment.front_schema), len(experiment.qos_schema))))
+        return {'mode': "out-of-core", 'method': "outofcore", 'shard_points': max(points, 1), 'workers': 1}
+
+    if step == "evolve":
+        # Every worker holds one generation at a time, and the reference data
+        count = workers(estimated.run_bytes, budget, shared, processes)
+        if count > 1:
+            return {'mode': "in-memory", 'workers': count}
+        depth = int((budget - shared * overhead) // max(estimated.run_bytes * overhead, 1)) - 1
+        return {'mode': "streaming", 'workers': 1, 'depth': max(0, min(depth, utils.prefetch_depth))}
+
+    if step == "qos":
+        # In memory, the QoS values of all the runs of an approach are kept in Python lists
+        if estimated.final_bytes * list_overhead * overhead <= budget:
+            return {'mode': "in-memory", 'workers': 1}
+        return {'mode': "streaming", 'workers': workers(estimated.run_bytes, budget, 0, processes)}
+
+    raise ValueError("Unknown step: " + str(step))
+
+def reset_peak():
+    '''
+    This method resets the peak resident set size of this process (Linux only).
+
+    Returns:
+        True when the peak was reset.
+    '''
+
+    try:
+        clear = open("/proc/self/clear_refs", "w")
+        clear.write("5")
+        clear.close()
+    except (IOError, OSError):
+        return False
+
+    return True
+
+def peak_rss():
+    '''
+    This method returns the peak resident set sizes (in bytes) of this process, since the last reset_peak or over its lifetime,
+    and of its largest terminated worker process (None when they are not available).
+    '''
+
+    rss = None
+    try:
+        status = open("/proc/self/status")
+        for line in status:
+            if line.startswith("VmHWM:"):
+                rss = int(line.split()[1]) * 1024
+        status.close()
+    except (IOError, OSError):
+        pass
+
+    if resource is None:
+        return (rss, None)
+
+    # Linux reports kilobytes, macOS bytes
+    scale = 1024
+    if sys.platform == "darwin":
+        scale = 1
+
+    if rss is None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    return (rss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+def measure(step, chosen, estimated, function, *arguments, **keywords):
+    '''
+    This method runs a step and reports its plan, its estimated working set and its peak memory.
+
+    Args:
+        step: The name of the step.
+        chosen: The plan of the step.
+        estimated: The Estimate of the step.
+        function: The function of the step, called with the other arguments.
+
+    Returns:
+        The result of the function.
+    '''
+
+    tracing = trace and tracemalloc is not None
+    started = False
+    previous = peak_rss()[1]
+    reset = reset_peak()
+    if tracing:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+
+    try:
+        result = function(*arguments, **keywords)
+    finally:
+        traced = None
+        if tracing:
+            traced = tracemalloc.get_traced_memory()[1]
+            if started:
+                tracemalloc.stop()
+
+    (rss, children) = peak_rss()
+    # The peak of the terminated worker processes only belongs to this step when the step raised it
+    if children is not None and previous is not None and children <= previous:
+        children = None
+    reports.append((step, chosen, estimated, traced, rss, children))
+
+    line = "Step " + step + ": " + chosen['mode'] + " with " + str(chosen['workers']) + " worker(s), estimated " + str(estimated)
+    if traced is not None:
+        line = line + ", peak traced memory = " + megabytes(traced)
+    if rss is not None and reset:
+        line = line + ", peak RSS = " + megabytes(rss)
+    elif rss is not None:
+        line = line + ", peak RSS of the process so far = " + megabytes(rss)
+    if children is not None:
+        line = line + ", peak RSS of the workers = " + megabytes(children)
+    print(line)
+
+    return result
+
+def initialise(start_run, end_run, model, functions, algorithms, folder, budget = None, processes = 1):
+    '''
+    This method calculates the reference data (see pareto.initialise) in memory with the configured pareto.method,
+    or out of core when the final generations of the runs do not fit in the memory budget and the configured method is exact
+    (the out-of-core reference data are exactly non-dominated, as the ones of the other exact methods).
+    With the "frontier" heuristic the reference data are always calculated in memory, with a warning when over the budget.
+
+    Args:
+        budget: The memory budget in bytes (memory_budget when None).
+        processes: The largest number of worker processes (1 for this process only, None for all the available cores).
+        The other arguments are the ones of pareto.initialise.
+
+    Returns:
+        A list of the referencePoint, utopiaPoint, and referenceSet.
+    '''
+
+    data = experiment.load(folder, model)
+    estimated = estimate([data.runset(function, algorithm) for algorithm in algorithms for function in functions], start_run, end_run)
+    chosen = plan("initialise", estimated, budget, 0, processes)
+
+    settings = (pareto.method, pareto.incremental, pareto.processes, pareto.shard_points)
+    pareto.method = chosen['method']
+    pareto.incremental = False
+    pareto.processes = chosen['workers']
+    if 'shard_points' in chosen:
+        pareto.shard_points = chosen['shard_points']
+
+    try:
+        return measure("initialise", chosen, estimated, pareto.initialise, start_run, end_run, model, functions, algorithms, folder)
+    finally:
+        (pareto.method, pareto.incremental, pareto.processes, pareto.shard_points) = settings
+
+def evolve_indicators(runs, model, function, algorithm, referencePoint, utopiaPoint, referenceSet, folder, budget = None, processes = 1, adaptive = False):
+    '''
+    This method calculates the evolution of the quality indicators (see estimating.evolve_indicators) in as many
+    worker processes as fit in the memory budget, or in this process with a bounded read-ahead of the generations.
+
+    Args:
+        budget: The memory budget in bytes (memory_budget when None).
+        processes: The largest number of worker processes (1 for this process only, None for all the available cores).
+        adaptive: When True only a sample of the generations is calculated (see estimating.adaptive_evolution).
+        The other arguments are the ones of estimating.evolve_indicators.
+
+    Returns:
+        The result of estimating.evolve_indicators.
+    '''
+
+    data = experiment.load(folder, model)
+    estimated = estimate([data.runset(function, algorithm)], 1, runs, ["Pareto"])
+    chosen = plan("evolve", estimated, budget, np.asarray(referenceSet).nbytes, processes)
+
+    depth = utils.prefetch_depth
+    if 'depth' in chosen:
+        utils.prefetch_depth = chosen['depth']
+
+    try:
+        return measure("evolve_indicators", chosen, estimated, estimating.evolve_indicators, runs, model, function, algorithm,
+                       referencePoint, utopiaPoint, referenceSet, folder, chosen['workers'], adaptive)
+    finally:
+        utils.prefetch_depth = depth
+
+def averageQoS(start_run, end_run, model, fixed, variables, approaches, referencePoint, utopiaPoint, referenceSet, folder, table, budget = None, processes = 1):
+    '''
+    This method calculates the QoS metrics table (see estimating.averageQoS) from all the QoS values in memory,
+    or from mergeable quantile sketches when the values do not fit in the memory budget.
+
+    Args:
+        budget: The memory budget in bytes (memory_budget when None).
+        processes: The largest number of worker processes (1 for this process only, None for all the available cores).
+        The other arguments are the ones of estimating.averageQoS.
+
+    Returns:
+        The calculated results in the desired Latex table format.
+    '''
+
+    data = experiment.load(folder, model)
+    # The QoS metrics table is calculated from the Pareto fronts
+    estimated = estimate([data.variation(start_run, variable, fixed[0]) for variable in variables], start_run, end_run, ["Pareto"])
+    chosen = plan("qos", estimated, budget, 0, processes)
+
+    return measure("averageQoS", chosen, estimated, estimating.averageQoS, start_run, end_run, model, fixed, variables, approaches,
+                   referencePoint, utopiaPoint, referenceSet, folder, table, chosen['mode'] == "streaming", chosen['workers'])
@@ -1,19 +1,28 @@
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+'''
+    Visualisation of the results of the experiments.
+
+    The matplotlib stack is only imported when a figure is actually drawn,
+    so that the experiments producing only tables do not pay for it.
+'''
+
 import random
 import csv
-import matplotlib.lines as lines
-import fnmatch
+import gc
+import numpy as np
 import os
 from os import listdir
 from os.path import isfile, join, exists
-from mayavi import mlab
-from pylab import *
 import utils
 import estimating
+import experiment
+import tests
 
 # Global Variables
 display = 0             # Print (1) or not (0) the produced figures in files
+deferred = False        # Queue the figures and render them later, all together, with render_pending (True) or render them at once (False)
+pending = []            # The queued rendering tasks
+point_budget = 2000     # Maximum number of points drawn for each Pareto front (None for drawing all the points)
+raster_limit = 500      # Scatter layers with more points are rasterised inside the (otherwise vector) pdf files
 
 def ApplyFont(ax):
     '''
@@ -24,6 +33,8 @@ def ApplyFont(ax):
         ax: The current axes of the figure for which we want to change the font style.
     '''
     
+    import matplotlib
+    
     matplotlib.rcParams['ps.useafm'] = True
     matplotlib.rcParams['pdf.use14corefonts'] = True
     matplotlib.rcParams['text.usetex'] = True
@@ -51,94 +62,263 @@ def ApplyFont(ax):
     txt_obj.set_fontname('Times New Roman')
     txt_obj.set_fontsize(text_size)
     
-def pareto2dplot(folders, approaches, colors, markers): 
+def new_figure():
+    '''
+    This method creates a new figure. Unless the figures are displayed on the screen, the figure is built with the 
+    object-oriented Agg API, so that it does not touch the pyplot global state and can be rendered in any process.
+    
+    Returns:
+        The new figure.
+    '''
+    
+    if display == 1:
+        import matplotlib.pyplot as plt
+        return plt.figure()
+    
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    return fig
+
+def save_figure(fig, pdf_name):
+    '''
+    This method saves a figure in a file and releases its memory.
+    
+    Args:
+        fig: The figure.
+        pdf_name: The name of the pdf file for storing the figure.
+    '''
+    
+    fig.savefig(pdf_name)
+    
+    # Draw the plot to the screen
+    if display == 1:
+        import matplotlib.pyplot as plt
+        plt.show()
+        plt.close(fig)
+    
+    fig.clf()
+    gc.collect()
+
+def render_task(arguments):
+    '''
+    This method renders a single figure in a worker process.
+    
+    Args:
+        arguments: A tuple (function, args) with the rendering function and its arguments.
+    '''
+    
+    (function, args) = arguments
+    function(*args)
+
+def render(tasks, processes = 1):
+    '''
+    This method renders a set of independent figures from precomputed data in a pool of worker processes
+    (or queues them when the rendering is deferred).
+    
+    Args:
+        tasks: A list of (function, args) tuples with the rendering functions and their arguments.
+        processes: The number of worker processes (1 for serial execution, None for all the available cores, which needs the fork start method or a __main__ guard in the calling script).
+    '''
+    
+    if deferred:
+        pending.extend(tasks)
+        return
+    
+    # The figures can only be displayed on the screen from the main process
+    if display == 1:
+        processes = 1
+    
+    utils.parallel_map(render_task, tasks, processes)
+
+def render_pending(processes = 1):
+    '''
+    This method renders all the queued figures in a pool of worker processes.
+    
+    Args:
+        processes: The number of worker processes (1 for serial execution, None for all the available cores, which needs the fork start method or a __main__ guard in the calling script).
+    '''
+    
+    global pending
+    tasks = pending
+    pending = []
+    
+    if display == 1:
+        processes = 1
+    
+    utils.parallel_map(render_task, tasks, processes)
+
+def read_front(folder):
+    '''
+    This method reads the Pareto front stored in a folder (one file per solution).
+    
+    Args:
+        folder: The folder that contains the Pareto front.
+        
+    Returns:
+        Array with the objective vectors of the front (see experiment.front_schema).
+    '''
+    
+    folder = folder + "/"
+    onlyfiles = utils.list_files(folder)
+    front = [experiment.front_schema.empty()]
+    
+    for item in onlyfiles:
+        front.append(experiment.front_schema.read(folder + item))
+    
+    return np.concatenate(front)
+
+def decimate(front, budget = None):
+    '''
+    This method reduces a front to a budget of points for plotting. The objective space is split into a grid of
+    epsilon-boxes, as fine as the budget allows, and each occupied box keeps only its point that is closest to the
+    ideal corner (the most relevant one for the hypervolume). The extreme points of every objective are always kept.
+    
+    Args:
+        front: Array with the objective vectors of the front.
+        budget: The maximum number of points (the point_budget of the module when None).
+        
+    Returns:
+        Array with the kept objective vectors, in their original order.
+    '''
+    
+    if budget is None:
+        budget = point_budget
+    
+    if budget is None or len(front) <= budget:
+        return front
+    
+    dimensions = front.shape[1]
+    
+    # Scale every objective to [0, 1]
+    minimum = front.min(axis = 0)
+    scale = front.max(axis = 0) - minimum
+    scale[scale == 0] = 1
+    scaled = (front - minimum) / scale
+    score = scaled.sum(axis = 1)
+    
+    extremes = np.concatenate([front.argmin(axis = 0), front.argmax(axis = 0)])
+    budget = max(budget - len(np.unique(extremes)), 1)
+    
+    def representatives(bins):
+        # The point with the lowest score of every occupied box
+        cells = np.minimum((scaled * bins).astype(np.int64), bins - 1)
+        boxes = np.ravel_multi_index(cells.T, (bins,) * dimensions)
+        order = np.lexsort((score, boxes))
+        first = np.concatenate(([True], boxes[order][1:] != boxes[order][:-1]))
+        return order[first]
+    
+    # Find the finest grid whose occupied boxes fit into the budget
+    low = 1
+    high = max(int(budget), 1)
+    kept = representatives(low)
+    
+    while low < high:
+        bins = (low + high + 1) // 2
+        candidates = representatives(bins)
+        if len(candidates) <= budget:
+            low = bins
+            kept = candidates
+        else:
+            high = bins - 1
+    
+    return front[np.union1d(kept, extremes)]
+
+def pareto2dplot(folders, approaches, colors, markers, pdf_name = "Pareto2D.pdf", processes = 1): 
     '''
     This method plots the 3D Pareto fronts achieved by the optimisation algorithms 
     where the third dimension (success rate) is indicated by the size of the points.
+    Large fronts are decimated to the point_budget of the module before plotting.
+    
+    Args:
+        folders: Folders that contain the Pareto fronts in comparison.
+        approaches: The names of the approaches used to be printed into the figures.
+        colors: The colors used for indicating the various approaches on the figures.
+        markers: The markers used for indicating the various approaches on the figures.
+        pdf_name: The name of the pdf file for storing the produced figure.
+        processes: The number of worker processes rendering the figure.
+    '''
+    
+    fronts = [decimate(read_front(folder)) for folder in folders]
+    render([(render_pareto2d, (fronts, folders, approaches, colors, markers, pdf_name))], processes)
+
+def render_pareto2d(fronts, folders, approaches, colors, markers, pdf_name):
+    '''
+    This method renders the 2D Pareto front figure from precomputed fronts.
     
     Args:
+        fronts: The arrays with the (ResponseTime, NetworkLatency, Energy) vectors of each front.
         folders: Folders that contain the Pareto fronts in comparison.
         approaches: The names of the approaches used to be printed into the figures.
         colors: The colors used for indicating the various approaches on the figures.
         markers: The markers used for indicating the various approaches on the figures.
+        pdf_name: The name of the pdf file for storing the produced figure.
     '''
     
-    fig = plt.figure()
+    import matplotlib.lines as lines
+    
+    fig = new_figure()
     ax = fig.add_subplot(111)
 
     offsetSize = 30
     
     handles = []
     
-    for (counter, folder) in enumerate(folders):
-        latency = []
-        sr = []
-        nrg = []
-        s = []
-        folder = folder + "/"
-        
-        onlyfiles = [ f for f in listdir(folder) if isfile(join(folder,f)) ]
-
-        for item in onlyfiles:
-            filename = folder + item
-
-            csv_file = csv.DictReader(open(filename, 'rb'), delimiter=',', quotechar='"')
-            for row in csv_file:
-                latency.append(float(row['ResponseTime']))
-                sr.append(float(row['NetworkLatency']))
-                nrg.append(float(row['Energy']))
-                s.append(math.pow((100 - float(row['Energy'])),1.5) + offsetSize)
+    for (counter, front) in enumerate(fronts):
+        s = np.power(100 - front[:, 2], 1.5) + offsetSize
                 
-        ax.scatter(latency, sr, s = s, c = colors[counter], marker = markers[counter], label = str(folder))
+        ax.scatter(front[:, 0], front[:, 1], s = s, c = colors[counter], marker = markers[counter], label = str(folders[counter]) + "/", rasterized = len(front) > raster_limit)
         handles.append(lines.Line2D([0],[0], linestyle="none", c = colors[counter], marker = markers[counter]))
     
     ax.set_xlabel('Network Latency')
     ax.set_ylabel('Energy Consumption')
     ax.legend(handles, approaches, numpoints = 1)
 
-    ApplyFont(plt.gca())
-    plt.savefig("Pareto2D.pdf")
-    
-    # Draw the plot to the screen
-    if display == 1:
-        plt.show()
-        
-    return
+    ApplyFont(ax)
+    save_figure(fig, pdf_name)
 
-def pareto3dplot(folders, approaches, colors, markers):  
+def pareto3dplot(folders, approaches, colors, markers, pdf_name = "Pareto3D.pdf", processes = 1):  
     '''
     This method plots the 3D Pareto fronts achieved by the optimisation algorithms
+    Large fronts are decimated to the point_budget of the module before plotting.
     
     Args:
         folders: Folders that contain the Pareto fronts in comparison.
         approaches: The names of the approaches used to be printed into the figures.
         colors: The colors used for indicating the various approaches on the figures.
         markers: The markers used for indicating the various approaches on the figures.
+        pdf_name: The name of the pdf file for storing the produced figure.
+        processes: The number of worker processes rendering the figure.
     '''
     
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
+    fronts = [decimate(read_front(folder)) for folder in folders]
+    render([(render_pareto3d, (fronts, folders, approaches, colors, markers, pdf_name))], processes)
 
-    handles = []
+def render_pareto3d(fronts, folders, approaches, colors, markers, pdf_name):  
+    '''
+    This method renders the 3D Pareto front figure from precomputed fronts.
     
-    for (counter, folder) in enumerate(folders):
-        latency = []
-        sr = []
-        nrg = []
-        folder = folder + "/"
-        
-        onlyfiles = [ f for f in listdir(folder) if isfile(join(folder,f)) ]
-
-        for item in onlyfiles:
-            filename = folder + item
+    Args:
+        fronts: The arrays with the (ResponseTime, NetworkLatency, Energy) vectors of each front.
+        folders: Folders that contain the Pareto fronts in comparison.
+        approaches: The names of the approaches used to be printed into the figures.
+        colors: The colors used for indicating the various approaches on the figures.
+        markers: The markers used for indicating the various approaches on the figures.
+        pdf_name: The name of the pdf file for storing the produced figure.
+    '''
+    
+    import matplotlib.lines as lines
+    from mpl_toolkits.mplot3d import Axes3D
+    
+    fig = new_figure()
+    ax = fig.add_subplot(111, projection='3d')
 
-            csv_file = csv.DictReader(open(filename, 'rb'), delimiter=',', quotechar='"')
-            for row in csv_file:
-                latency.append(float(row['ResponseTime']))
-                sr.append(float(row['NetworkLatency']))
-                nrg.append(float(row['Energy']))
+    handles = []
     
-        ax.scatter(latency, sr, nrg, s = 100, c = colors[counter], marker = markers[counter], label = str(folder))
+    for (counter, front) in enumerate(fronts):
+        ax.scatter(front[:, 0], front[:, 1], front[:, 2], s = 100, c = colors[counter], marker = markers[counter], label = str(folders[counter]) + "/", rasterized = len(front) > raster_limit)
         handles.append(lines.Line2D([0],[0], linestyle="none", c = colors[counter], marker = markers[counter]))
     
     ax.set_xlabel('Network Latency')
@@ -147,17 +327,12 @@ def pareto3dplot(folders, approaches, colors, markers):
     ax.legend(handles, approaches, numpoints = 1)
     
     # Save the figure in a separate file
-    plt.savefig('Pareto3D.pdf')
-
-    # Draw the plot to the screen
-    if display == 1:
-        plt.show()
-    
-    return
+    save_figure(fig, pdf_name)
 
-def boxplotIndicators(start_run, end_run, indicators, indicators_names, model, fixed, variables, approaches, referencePoint, utopiaPoint, referenceSet, pdf_names, folder):
+def boxplotIndicators(start_run, end_run, indicators, indicators_names, model, fixed, variables, approaches, referencePoint, utopiaPoint, referenceSet, pdf_names, folder, intervals = False, processes = 1):
     '''
     This method boxplots for the quality indicator values for each of the methods in comparison.
+    The indicators are calculated once for all the figures, which are then rendered from the precomputed values.
     
     Args:
         start_run: The first run number of the experiments.
@@ -173,93 +348,94 @@ def boxplotIndicators(start_run, end_run, indicators, indicators_names, model, f
         referenceSet: The normalised reference set of all the experimental runs.
         pdf_names: The name of the pdf files for storing the produced figures.
         folder: The folder of the experiments.
+        intervals: When true the bootstrap confidence intervals of the means are drawn over the boxes.
+        processes: The number of worker processes calculating the indicators and the bootstrap confidence intervals, and rendering the figures.
     '''    
     
-    x = range(1, len(approaches) + 1)
-        
+    # (variables x runs x indicators) values of all the indicators
+    values = estimating.indicator_tensor(start_run, end_run, model, fixed, variables, referencePoint, utopiaPoint, referenceSet, folder, processes)
+    # Only the first (end_run - start_run) runs are drawn
+    values = values[:, 0:end_run - start_run, :]
+    
+    bounds = None
+    if intervals:
+        tasks = []
+        for i in range(0, indicators):
+            tasks.extend([('bootstrap', values[k, :, i], tests.resamples, [tests.seed, i, k, k]) for k in range(0, len(variables))])
+        bounds = np.asarray(utils.parallel_map(tests.resampling_task, tasks, processes)).reshape(indicators, len(variables), 2)
+    
+    tasks = []
     for i in range(0, indicators):
-        counter = 0
-        
-        fig = plt.figure(i)
-        ax = fig.add_subplot(111)
-        ax.set_xlim([1, len(approaches) + 1])
-        data_all = []
-        index = 0
-        
-        for variable in variables:
-            results_total = []  
-            data = []
-            local = 0
+        tasks.append((render_boxplot, (values[:, :, i], indicators_names[i], approaches, pdf_names[i], None if bounds is None else bounds[i])))
+    
+    render(tasks, processes)
 
-            for run in range(start_run, end_run + 1):
-                
-                dir_name = folder + str(run) + "/" + model + "/" + variable + "/" + str(fixed[0])
-            
-                # Find the right variation point (fitness function or optimisation algorithm)
-                if exists(dir_name):    
-                    final_generation = utils.find_final_generation(run, model, variable, fixed[0], folder)
-                    dir_name = folder + str(run) + "/" + model + "/" + variable + "/" + str(fixed[0]) + "/Pareto/Generation" + str(final_generation) + "/"
-                    # Results in the form of: hv_mean, hv_std, gd_mean, gd_std, delta_mean, delta_std
-                    results = estimating.calculate_indicators(run, model, variable, str(fixed[0]), referencePoint, utopiaPoint, referenceSet, folder)
-                else:     
-                    final_generation = utils.find_final_generation(run, model, fixed[0], variable, folder)
-                    dir_name = folder + str(run) + "/" + model + "/" + str(fixed[0]) + "/" + variable + "/Pareto/Generation" + str(final_generation) + "/"
-                    # Results in the form of: hv_mean, hv_std, gd_mean, gd_std, delta_mean, delta_std
-                    results = estimating.calculate_indicators(run, model, str(fixed[0]),  variable, referencePoint, utopiaPoint, referenceSet, folder)
-                    
-                results_total.append(results)
-                local = local + len(approaches)
-            index = index + 1
-    
-            # Store the results for a quality indicator for all the fitness functions used
-            for j in range(0, end_run - start_run):
-                data.append(float(results_total[j][i]))
-            
-            data_all.append(np.asarray(data))
-                    
-        ax.set_ylabel(indicators_names[i])
-        plt.xticks(x, approaches)
-        
-        for item in ([ax.title, ax.xaxis.label, ax.yaxis.label] + ax.get_xticklabels() + ax.get_yticklabels()):
-            item.set_fontsize(20)
-            
-        ## add patch_artist=True option to ax.boxplot() 
-        ## to get fill color
-        bp = ax.boxplot([data_all[item] for item in range(0, len(variables))], patch_artist=True)
-        print(bp.keys())
-        ## change outline color, fill color and linewidth of the boxes
-        for box in bp['boxes']:
-            # change outline color
-            box.set(color= 'black', linewidth=2)
-            # change fill color
-            box.set(facecolor = 'black' , alpha=0.2)
-
-        ## change color and linewidth of the whiskers
-        for whisker in bp['whiskers']:
-            whisker.set(color='black', linewidth=2)
-
-        ## change color and linewidth of the caps
-        for cap in bp['caps']:
-            cap.set(color='black', linewidth=2)
-
-        ## change color and linewidth of the medians
-        for median in bp['medians']:
-            median.set(color='black', linewidth=2)
-
-        ## change the style of fliers and their fill
-        for flier in bp['fliers']:
-            flier.set(marker='o', color='black', alpha=0.5)
-
-        # Save the figure in a separate file
-        plt.savefig(pdf_names[i])
+def render_boxplot(data_all, indicator_name, approaches, pdf_name, bounds = None):
+    '''
+    This method renders the boxplot of a quality indicator from precomputed values.
+    
+    Args:
+        data_all: (approaches x runs) array with the indicator values.
+        indicator_name: The name of the quality indicator.
+        approaches: The names of the optimisation algorithms used to be printed into the figure.
+        pdf_name: The name of the pdf file for storing the produced figure.
+        bounds: (approaches x 2) array with the bootstrap confidence intervals of the means (not drawn when None).
+    '''
+    
+    x = range(1, len(approaches) + 1)
+    
+    fig = new_figure()
+    ax = fig.add_subplot(111)
+    ax.set_xlim([1, len(approaches) + 1])
+    
+    ax.set_ylabel(indicator_name)
+    ax.set_xticks(x)
+    ax.set_xticklabels(approaches)
+    
+    for item in ([ax.title, ax.xaxis.label, ax.yaxis.label] + ax.get_xticklabels() + ax.get_yticklabels()):
+        item.set_fontsize(20)
         
-        # Draw the plot to the screen
-        if display == 1:
-            plt.show()
+    ## add patch_artist=True option to ax.boxplot() 
+    ## to get fill color
+    bp = ax.boxplot([data_all[item] for item in range(0, len(data_all))], patch_artist=True)
+    print(bp.keys())
+    ## change outline color, fill color and linewidth of the boxes
+    for box in bp['boxes']:
+        # change outline color
+        box.set(color= 'black', linewidth=2)
+        # change fill color
+        box.set(facecolor = 'black' , alpha=0.2)
+
+    ## change color and linewidth of the whiskers
+    for whisker in bp['whiskers']:
+        whisker.set(color='black', linewidth=2)
+
+    ## change color and linewidth of the caps
+    for cap in bp['caps']:
+        cap.set(color='black', linewidth=2)
+
+    ## change color and linewidth of the medians
+    for median in bp['medians']:
+        median.set(color='black', linewidth=2)
+
+    ## change the style of fliers and their fill
+    for flier in bp['fliers']:
+        flier.set(marker='o', color='black', alpha=0.5)
+
+    ## add the bootstrap confidence intervals of the means
+    if bounds is not None:
+        means = [data_all[k].mean() for k in range(0, len(data_all))]
+        errors = [[means[k] - bounds[k][0] for k in range(0, len(data_all))], [bounds[k][1] - means[k] for k in range(0, len(data_all))]]
+        ax.errorbar(range(1, len(data_all) + 1), means, yerr = errors, fmt = 'D', color = 'black', capsize = 6)
+
+    # Save the figure in a separate file
+    save_figure(fig, pdf_name)
             
-def printEvolution(start_run, end_run, indicators, indicators_names, model, functions, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, pdf_names, colors, markers, linestyle, folder):
+def printEvolution(start_run, end_run, indicators, indicators_names, model, functions, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, pdf_names, colors, markers, linestyle, folder, processes = 1, adaptive = False):
     '''
     This method visualises the evolution of the quality indicator values for each of the methods in comparison.
+    The indicators of every run and generation are calculated once, in an (algorithms x runs x generations x indicators) 
+    tensor, and the figures are then rendered from its means and standard deviations.
     
     Args:
         start_run: The first run number of the experiments.
@@ -278,41 +454,77 @@ def printEvolution(start_run, end_run, indicators, indicators_names, model, func
         markers: The markers used for indicating the various approaches on the figures.
         linestyle: The style of lines used for indicating the various approaches on the figures.
         folder: The folder of the experiments.
+        processes: The number of worker processes calculating the indicators and rendering the figures.
+        adaptive: When True only a sample of the generations is calculated and the others are interpolated,
+                  with error bars for the interpolated values (see estimating.adaptive_evolution).
     '''   
     
     final_generation = utils.find_final_generation(end_run, model, functions[0], algorithms[0], folder)
     
+    # (algorithms x runs x generations x indicators) values of all the indicators
+    errors = None
+    if adaptive:
+        tensor, errors = estimating.adaptive_tensor(end_run, model, str(functions[0]), algorithms, referencePoint, utopiaPoint, referenceSet, folder, final_generation, processes)
+        errors = np.round(errors, 4)
+    else:
+        tensor = estimating.evolution_tensor(end_run, model, str(functions[0]), algorithms, referencePoint, utopiaPoint, referenceSet, folder, final_generation, processes)
+    means = np.round(tensor.mean(axis = 1), 4)
+    stds = np.round(tensor.std(axis = 1), 4)
+    
+    tasks = []
     for i in range(0, indicators):
-        fig = plt.figure(i)
-        ax = fig.add_subplot(111)
-        ax.set_xlim([1, final_generation])
-        x = range(1, final_generation + 1)
+        interpolation = None
+        if errors is not None:
+            interpolation = errors[:, :, i]
+        tasks.append((render_evolution, (means[:, :, i], stds[:, :, i], indicators_names[i], approaches, pdf_names[i], colors, markers, linestyle, interpolation)))
+    
+    render(tasks, processes)
 
-        handles = []
-        counter = 0
-        
-        for algorithm in algorithms:
-            # Results in the form of: hv_mean, hv_std, gd_mean, gd_std, delta_mean, delta_std
-            results = estimating.evolve_indicators(end_run, model, str(functions[0]), algorithm, referencePoint, utopiaPoint, referenceSet, folder)
-            # Plot the data errors bars (std)
-            plt.errorbar(x, results[i*2], yerr = results[i*2+1], ecolor = colors[counter])
-            # Plot the data (mean)
-            plt.plot(x, results[i*2], linestyle[counter])
-            # For the legends
-            ax.scatter(x, results[i*2], s = 90, c = colors[counter], marker = markers[counter], label = str(approaches[counter]))
-            handles.append(lines.Line2D([0],[0], linestyle="none", c = colors[counter], marker = markers[counter]))
-            counter = counter + 1
-        
-        ax.set_ylabel(indicators_names[i])
-        ax.set_xlabel('# of Generation')
-        ax.legend(handles, approaches, numpoints = 1, loc = 4)
-        
-        for item in ([ax.title, ax.xaxis.label, ax.yaxis.label] + ax.get_xticklabels() + ax.get_yticklabels()):
-            item.set_fontsize(20)
-            
-        # Save the figure in a separate file
-        plt.savefig(pdf_names[i])   
+def render_evolution(means, stds, indicator_name, approaches, pdf_name, colors, markers, linestyle, errors = None):
+    '''
+    This method renders the evolution of a quality indicator from precomputed values.
+    
+    Args:
+        means: (algorithms x generations) array with the mean indicator values.
+        stds: (algorithms x generations) array with the standard deviations of the indicator values.
+        indicator_name: The name of the quality indicator.
+        approaches: The names of the optimisation algorithms used to be printed into the figure.
+        pdf_name: The name of the pdf file for storing the produced figure.
+        colors: The colors used for indicating the various approaches on the figures.
+        markers: The markers used for indicating the various approaches on the figures.
+        linestyle: The style of lines used for indicating the various approaches on the figures.
+        errors: (algorithms x generations) array with the error bars of the interpolated mean values (None when every generation is calculated).
+    '''
+    
+    import matplotlib.lines as lines
+    
+    final_generation = means.shape[1]
+    
+    fig = new_figure()
+    ax = fig.add_subplot(111)
+    ax.set_xlim([1, final_generation])
+    x = range(1, final_generation + 1)
 
-        # Draw the plot to the screen
-        if display == 1:
-            plt.show()
\ No newline at end of file
+    handles = []
+    
+    for counter in range(0, len(means)):
+        # Plot the data errors bars (std)
+        ax.errorbar(x, means[counter], yerr = stds[counter], ecolor = colors[counter])
+        # Plot the interpolation errors bars
+        if errors is not None:
+            ax.fill_between(x, means[counter] - errors[counter], means[counter] + errors[counter], color = colors[counter], alpha = 0.3)
+        # Plot the data (mean)
+        ax.plot(x, means[counter], linestyle[counter])
+        # For the legends
+        ax.scatter(x, means[counter], s = 90, c = colors[counter], marker = markers[counter], label = str(approaches[counter]))
+        handles.append(lines.Line2D([0],[0], linestyle="none", c = colors[counter], marker = markers[counter]))
+    
+    ax.set_ylabel(indicator_name)
+    ax.set_xlabel('# of Generation')
+    ax.legend(handles, approaches, numpoints = 1, loc = 4)
+    
+    for item in ([ax.title, ax.xaxis.label, ax.yaxis.label] + ax.get_xticklabels() + ax.get_yticklabels()):
+        item.set_fontsize(20)
+        
+    # Save the figure in a separate file
+    save_figure(fig, pdf_name)
@@ -0,0 +1,235 @@
+'''
+    Mergeable quantile sketches for summarising very large sets of QoS values
+    with bounded memory (KLL sketch).
+'''
+
+import math
+import random
+import numpy
+
+class QuantileSketch(object):
+    '''
+    A KLL quantile sketch. Values are kept in a hierarchy of compactors, where an item stored
+    at level h stands for 2^h original values. When a compactor is full it is sorted and every
+    other item is promoted to the next level, so the memory stays bounded by roughly 3k items.
+    The rank error of a quantile query is in the order of 1/k of the total number of values.
+
+    The count, mean, standard deviation, minimum and maximum are tracked exactly.
+    Two sketches built over disjoint sets of values can be merged into a sketch of their union.
+    '''
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.compactors = [[]]
+        self.size = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = float('inf')
+        self.maximum = float('-inf')
+        self.random = random.Random(seed)
+
+    def capacity(self, level):
+        '''
+        This method returns the number of items that the compactor of a given level can hold.
+
+        Args:
+            level: The level of the compactor.
+
+        Returns:
+            The capacity of the compactor.
+        '''
+
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * math.pow(2.0 / 3.0, depth))) + 1
+
+    def max_size(self):
+        '''
+        This method returns the total number of items that the sketch can hold before compressing.
+        '''
+
+        return sum([self.capacity(level) for level in range(0, len(self.compactors))])
+
+    def update(self, value):
+        '''
+        This method adds a single value to the sketch.
+
+        Args:
+            value: The value to be added.
+        '''
+
+        self.extend([value])
+
+    def extend(self, values):
+        '''
+        This method adds a list of values to the sketch.
+
+        Args:
+            values: The values to be added.
+        '''
+
+        values = numpy.asarray(values, dtype=float).ravel()
+
+        if len(values) == 0:
+            return
+
+        mean = float(values.mean())
+        self.add_moments(len(values), mean, float(((values - mean) ** 2).sum()), float(values.min()), float(values.max()))
+
+        # Feed the level 0 compactor in blocks so that the memory stays bounded
+        block = max(self.capacity(0), 1)
+        for start in range(0, len(values), block):
+            chunk = values[start:start + block].tolist()
+            self.compactors[0].extend(chunk)
+            self.size = self.size + len(chunk)
+            self.compress()
+
+    def add_moments(self, count, mean, m2, minimum, maximum):
+        '''
+        This method combines the exact statistics of a set of values with the ones of the sketch.
+
+        Args:
+            count: The number of values.
+            mean: The mean of the values.
+            m2: The sum of squared differences from the mean of the values.
+            minimum: The minimum of the values.
+            maximum: The maximum of the values.
+        '''
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.m2 = self.m2 + m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    def compress(self):
+        '''
+        This method compacts the lowest full compactor until the sketch is within its size limit.
+        '''
+
+        while self.size > self.max_size():
+            for level in range(0, len(self.compactors)):
+                if len(self.compactors[level]) >= self.capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    items = sorted(self.compactors[level])
+                    # Keep the odd item (if any) at the current level
+                    if len(items) % 2 == 1:
+                        self.compactors[level] = [items.pop()]
+                    else:
+                        self.compactors[level] = []
+                    promoted = items[self.random.randint(0, 1)::2]
+                    self.compactors[level + 1].extend(promoted)
+                    self.size = self.size - len(items) + len(promoted)
+                    break
+
+    def merge(self, other):
+        '''
+        This method merges another sketch into this one.
+
+        Args:
+            other: The sketch to be merged.
+
+        Returns:
+            The merged sketch (self).
+        '''
+
+        if other.count == 0:
+            return self
+
+        self.add_moments(other.count, other.mean, other.m2, other.minimum, other.maximum)
+
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level in range(0, len(other.compactors)):
+            self.compactors[level].extend(other.compactors[level])
+        self.size = sum([len(compactor) for compactor in self.compactors])
+        self.compress()
+
+        return self
+
+    def std(self):
+        '''
+        This method returns the (population) standard deviation of the values added to the sketch.
+        '''
+
+        if self.count == 0:
+            return float('nan')
+        return math.sqrt(self.m2 / self.count)
+
+    def quantile(self, q):
+        '''
+        This method estimates the q-quantile of the values added to the sketch.
+
+        Args:
+            q: The quantile in [0, 1].
+
+        Returns:
+            The estimated value of the quantile. The 0 and 1 quantiles are exact, and so are all the
+            quantiles (linearly interpolated) as long as the sketch holds all the values.
+        '''
+
+        if self.count == 0:
+            return float('nan')
+        if q <= 0:
+            return self.minimum
+        if q >= 1:
+            return self.maximum
+
+        # Nothing has been compacted yet, so the exact quantile can be returned
+        if len(self.compactors) == 1:
+            return float(numpy.percentile(self.compactors[0], q * 100))
+
+        items = []
+        weights = []
+        for (level, compactor) in enumerate(self.compactors):
+            items.extend(compactor)
+            weights.extend([2 ** level] * len(compactor))
+
+        items = numpy.asarray(items)
+        weights = numpy.asarray(weights, dtype=float)
+        order = items.argsort(kind='mergesort')
+        cumulative = weights[order].cumsum()
+
+        # Find the first item whose cumulative weight reaches the requested rank
+        position = numpy.searchsorted(cumulative, q * cumulative[-1])
+        return float(items[order[min(position, len(order) - 1)]])
+
+    def summary(self, digits):
+        '''
+        This method returns the statistics of the QoS tables for the values added to the sketch.
+
+        Args:
+            digits: The number of digits for rounding the results.
+
+        Returns:
+            A list with the Mean, SD, Min, 1st Qu., Median, 3rd Qu. and Max values.
+        '''
+
+        return [round(self.mean, digits),
+                round(self.std(), digits),
+                round(self.minimum, digits),
+                round(self.quantile(0.25), digits),
+                round(self.quantile(0.5), digits),
+                round(self.quantile(0.75), digits),
+                round(self.maximum, digits)]
+
+def merge_sketches(sketches, k=200, seed=0):
+    '''
+    This method merges a list of sketches into a single one.
+
+    Args:
+        sketches: The sketches to be merged.
+        k: The size parameter of the merged sketch.
+        seed: The seed of the compactions of the merged sketch, fixed so that merging the same sketches gives the same summary.
+
+    Returns:
+        A sketch summarising the union of the values of the input sketches.
+    '''
+
+    merged = QuantileSketch(k, seed)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,452 @@
+'''
+    Statistical testing of the results of the experiments.
+
+    All the pairwise Wilcoxon rank-sum (Mann-Whitney U) tests, the Kruskal-Wallis omnibus test
+    and the Vargha-Delaney A12 effect sizes are calculated at once for all the quality indicators,
+    using vectorised rank computations over (indicators x approaches x runs) arrays.
+    For small numbers of runs, permutation tests and bootstrap confidence intervals are also available.
+    scipy is only imported when a test is actually performed.
+'''
+
+import itertools
+import numpy as np
+import utils
+
+#
+# Parameters
+#
+significance = 0.05     # Significance level of the statistical tests
+correction = 'holm'     # Multiple-comparison correction of the pairwise p-values (holm, bonferroni, fdr or none)
+resamples = 20000       # Number of resamples of the permutation tests and the bootstrap confidence intervals
+confidence = 0.95       # Confidence level of the bootstrap confidence intervals
+block_size = 1000       # Number of resamples generated at once (vectorised block)
+seed = 0                # Seed of the resampling (the results are reproducible for a given seed)
+
+class Comparison(object):
+    '''
+    The outcome of the statistical comparison of a set of approaches over a set of quality indicators.
+
+    Attributes:
+        pvalues: (indicators x approaches x approaches) array with the pairwise rank-sum test p-values.
+        adjusted: The pairwise p-values after the multiple-comparison correction (per indicator).
+        a12: (indicators x approaches x approaches) array with the Vargha-Delaney A12 effect sizes,
+             i.e. the probability that a run of the row approach achieves a higher value than a run of the column approach.
+        kruskal: Array with the Kruskal-Wallis omnibus test p-value of each indicator.
+        intervals: (indicators x approaches x 2) array with the bootstrap confidence intervals of the means
+                   (only available for the resampling-based comparisons).
+    '''
+
+    def __init__(self, pvalues, adjusted, a12, kruskal, intervals = None):
+        self.pvalues = pvalues
+        self.adjusted = adjusted
+        self.a12 = a12
+        self.kruskal = kruskal
+        self.intervals = intervals
+
+    def significant(self, indicator, first, second):
+        '''
+        This method checks whether two approaches differ significantly with respect to a quality indicator.
+
+        Args:
+            indicator: The index of the quality indicator.
+            first: The index of the first approach.
+            second: The index of the second approach.
+
+        Returns:
+            True when the corrected p-value is lower than the significance level.
+        '''
+
+        return self.adjusted[indicator, first, second] < significance
+
+def ranks(data):
+    '''
+    This method calculates the ranks of the values along the last axis of an array (ties get their average rank).
+
+    Args:
+        data: The input array.
+
+    Returns:
+        An array of the same shape with the ranks (starting from 1).
+    '''
+
+    data = np.asarray(data, dtype=float)
+    order = data.argsort(axis=-1, kind='mergesort')
+    sorted_data = np.take_along_axis(data, order, axis=-1)
+
+    # Positions at which a new group of tied values starts
+    n = data.shape[-1]
+    starts = np.ones(sorted_data.shape, dtype=bool)
+    starts[..., 1:] = sorted_data[..., 1:] != sorted_data[..., :-1]
+
+    # First and last position of the tie group of every sorted element
+    positions = np.broadcast_to(np.arange(n), sorted_data.shape)
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=-1)
+    ends = np.ones(sorted_data.shape, dtype=bool)
+    ends[..., :-1] = starts[..., 1:]
+    last = np.flip(np.minimum.accumulate(np.flip(np.where(ends, positions, n - 1), axis=-1), axis=-1), axis=-1)
+
+    sorted_ranks = (first + last) / 2.0 + 1
+    result = np.empty(data.shape)
+    np.put_along_axis(result, order, sorted_ranks, axis=-1)
+
+    return result
+
+def tie_term(data):
+    '''
+    This method calculates the sum of (t^3 - t) over the groups of tied values along the last axis of an array,
+    as needed for the tie correction of the rank-based tests.
+
+    Args:
+        data: The input array.
+
+    Returns:
+        An array with the tie term of each row.
+    '''
+
+    data = np.asarray(data, dtype=float)
+    # Size of the tie group of each value
+    t = (data[..., :, None] == data[..., None, :]).sum(axis=-1)
+
+    return (t * t - 1).sum(axis=-1).astype(float)
+
+def adjust_pvalues(pvalues, method = None):
+    '''
+    This method applies a multiple-comparison correction to a family of p-values (along the last axis).
+
+    Args:
+        pvalues: The input p-values.
+        method: The correction method (holm, bonferroni, fdr or none). The module default is used when None.
+
+    Returns:
+        The corrected p-values.
+    '''
+
+    if method is None:
+        method = correction
+
+    pvalues = np.asarray(pvalues, dtype=float)
+    m = pvalues.shape[-1]
+
+    if method == 'none' or m == 0:
+        return pvalues.copy()
+    if method == 'bonferroni':
+        return np.minimum(pvalues * m, 1.0)
+
+    order = pvalues.argsort(axis=-1, kind='mergesort')
+    sorted_p = np.take_along_axis(pvalues, order, axis=-1)
+    k = np.arange(m)
+
+    if method == 'holm':
+        sorted_adjusted = np.maximum.accumulate(sorted_p * (m - k), axis=-1)
+    elif method == 'fdr':
+        # Benjamini-Hochberg step-up procedure
+        sorted_adjusted = np.flip(np.minimum.accumulate(np.flip(sorted_p * m / (k + 1.0), axis=-1), axis=-1), axis=-1)
+    else:
+        raise ValueError("Unknown multiple-comparison correction: " + str(method))
+
+    adjusted = np.empty(pvalues.shape)
+    np.put_along_axis(adjusted, order, np.minimum(sorted_adjusted, 1.0), axis=-1)
+
+    return adjusted
+
+def ranksum(group1, group2):
+    '''
+    This method performs the two-sided Wilcoxon rank-sum (Mann-Whitney U) test for pairs of samples
+    stored along the last axis of two arrays (normal approximation with tie and continuity correction).
+
+    Args:
+        group1: Array with the samples of the first groups.
+        group2: Array with the samples of the second groups.
+
+    Returns:
+        A pair of arrays with the p-values and the Vargha-Delaney A12 effect sizes (of group1 over group2).
+    '''
+
+    from scipy import stats
+
+    group1 = np.asarray(group1, dtype=float)
+    group2 = np.asarray(group2, dtype=float)
+    n1 = group1.shape[-1]
+    n2 = group2.shape[-1]
+    n = n1 + n2
+
+    pooled = np.concatenate((group1, group2), axis=-1)
+    u = ranks(pooled)[..., :n1].sum(axis=-1) - n1 * (n1 + 1) / 2.0
+    a12 = u / (n1 * n2)
+
+    mu = n1 * n2 / 2.0
+    sigma = np.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term(pooled) / (n * (n - 1.0))))
+
+    difference = np.abs(u - mu)
+    z = np.where(sigma > 0, np.maximum(difference - 0.5, 0) / np.where(sigma > 0, sigma, 1), 0)
+    pvalues = np.where(sigma > 0, 2 * stats.norm.sf(z), 1.0)
+
+    return np.minimum(pvalues, 1.0), a12
+
+def getPValue(group1, group2):
+    '''
+    This method calculates the p-value of the two-sided Wilcoxon rank-sum test between two samples.
+
+    Args:
+        group1: The first sample.
+        group2: The second sample.
+
+    Returns:
+        The p-value of the test.
+    '''
+
+    pvalue, a12 = ranksum(group1, group2)
+    return float(pvalue)
+
+def kruskal_wallis(groups):
+    '''
+    This method performs the Kruskal-Wallis omnibus test for a list of (possibly unequally sized) samples.
+
+    Args:
+        groups: The list of samples.
+
+    Returns:
+        The p-value of the test.
+    '''
+
+    from scipy import stats
+
+    groups = [np.asarray(group, dtype=float).ravel() for group in groups]
+    sizes = np.array([len(group) for group in groups], dtype=float)
+    pooled = np.concatenate(groups)
+    n = float(len(pooled))
+
+    if len(groups) < 2 or n < 2:
+        return 1.0
+
+    pooled_ranks = ranks(pooled)
+    bounds = np.concatenate(([0], np.cumsum(sizes).astype(int)))
+    rank_sums = np.add.reduceat(pooled_ranks, bounds[:-1])
+
+    h = 12.0 / (n * (n + 1)) * (rank_sums ** 2 / sizes).sum() - 3 * (n + 1)
+
+    # Tie correction (counted over the sorted pooled values)
+    counts = np.unique(pooled, return_counts=True)[1].astype(float)
+    denominator = 1 - (counts ** 3 - counts).sum() / (n ** 3 - n)
+
+    if denominator <= 0:
+        return 1.0
+
+    return float(stats.chi2.sf(h / denominator, len(groups) - 1))
+
+def compare(data, method = None):
+    '''
+    This method compares all the approaches with each other for all the quality indicators at once.
+
+    Args:
+        data: (indicators x approaches x runs) array with the indicator values achieved by each run of each approach.
+        method: The multiple-comparison correction method (the module default is used when None).
+
+    Returns:
+        A Comparison holding the pairwise p-values (raw and corrected), the A12 effect sizes and the Kruskal-Wallis p-values.
+    '''
+
+    from scipy import stats
+
+    data = np.asarray(data, dtype=float)
+    (indicators, approaches, runs) = data.shape
+
+    # All the pairwise tests of all the indicators in a single vectorised call
+    (first, second) = np.triu_indices(approaches, 1)
+    pair_pvalues, pair_a12 = ranksum(data[:, first, :], data[:, second, :])
+    pair_adjusted = adjust_pvalues(pair_pvalues, method)
+
+    pvalues = np.ones((indicators, approaches, approaches))
+    adjusted = np.ones((indicators, approaches, approaches))
+    a12 = np.full((indicators, approaches, approaches), 0.5)
+
+    pvalues[:, first, second] = pair_pvalues
+    pvalues[:, second, first] = pair_pvalues
+    adjusted[:, first, second] = pair_adjusted
+    adjusted[:, second, first] = pair_adjusted
+    a12[:, first, second] = pair_a12
+    a12[:, second, first] = 1 - pair_a12
+
+    # Kruskal-Wallis omnibus test of all the indicators at once
+    pooled = data.reshape(indicators, approaches * runs)
+    n = float(approaches * runs)
+    rank_sums = ranks(pooled).reshape(indicators, approaches, runs).sum(axis=-1)
+    h = 12.0 / (n * (n + 1)) * (rank_sums ** 2 / runs).sum(axis=-1) - 3 * (n + 1)
+    denominator = 1 - tie_term(pooled) / (n ** 3 - n)
+    kruskal = np.where(denominator > 0, stats.chi2.sf(h / np.where(denominator > 0, denominator, 1), approaches - 1), 1.0)
+
+    return Comparison(pvalues, adjusted, a12, kruskal)
+
+def permutation_test(group1, group2, iterations = None, random_seed = None):
+    '''
+    This method performs a two-sided permutation test on the difference of the means of two samples.
+    When the number of distinct permutations does not exceed the number of resamples the test is exact,
+    otherwise random permutations are generated in vectorised blocks.
+
+    Args:
+        group1: The first sample.
+        group2: The second sample.
+        iterations: The number of random permutations (the module default is used when None).
+        random_seed: The seed of the random permutations (the module default is used when None).
+
+    Returns:
+        The p-value of the test.
+    '''
+
+    from scipy import special
+
+    if iterations is None:
+        iterations = resamples
+    if random_seed is None:
+        random_seed = seed
+
+    pooled = np.concatenate((np.asarray(group1, dtype=float).ravel(), np.asarray(group2, dtype=float).ravel()))
+    n1 = len(group1)
+    n2 = len(pooled) - n1
+    total = pooled.sum()
+    observed = abs(pooled[:n1].mean() - pooled[n1:].mean())
+    # Tolerance for the floating point comparison with the observed difference
+    tolerance = 1e-12 * max(1.0, observed)
+
+    combinations = special.comb(len(pooled), n1, exact=True)
+    count = 0
+
+    if combinations <= iterations:
+        # Exact test: enumerate all the ways of assigning the pooled values to the first group
+        indices = itertools.combinations(range(0, len(pooled)), n1)
+        while True:
+            block = np.array(list(itertools.islice(indices, block_size)), dtype=int).reshape(-1, n1)
+            if len(block) == 0:
+                break
+            sums = pooled[block].sum(axis=1)
+            count = count + (np.abs(sums / n1 - (total - sums) / n2) >= observed - tolerance).sum()
+        return float(count) / combinations
+
+    generator = np.random.RandomState(random_seed)
+    done = 0
+
+    while done < iterations:
+        size = min(block_size, iterations - done)
+        block = generator.rand(size, len(pooled)).argsort(axis=1)[:, :n1]
+        sums = pooled[block].sum(axis=1)
+        count = count + (np.abs(sums / n1 - (total - sums) / n2) >= observed - tolerance).sum()
+        done = done + size
+
+    return (count + 1.0) / (iterations + 1.0)
+
+def bootstrap_interval(sample, iterations = None, random_seed = None):
+    '''
+    This method calculates the percentile bootstrap confidence interval of the mean of a sample.
+    The bootstrap resamples are generated in vectorised blocks.
+
+    Args:
+        sample: The input sample.
+        iterations: The number of bootstrap resamples (the module default is used when None).
+        random_seed: The seed of the resampling (the module default is used when None).
+
+    Returns:
+        A list (low, high) with the bounds of the confidence interval.
+    '''
+
+    if iterations is None:
+        iterations = resamples
+    if random_seed is None:
+        random_seed = seed
+
+    sample = np.asarray(sample, dtype=float).ravel()
+    generator = np.random.RandomState(random_seed)
+    means = []
+    done = 0
+
+    while done < iterations:
+        size = min(block_size, iterations - done)
+        means.append(sample[generator.randint(0, len(sample), (size, len(sample)))].mean(axis=1))
+        done = done + size
+
+    alpha = (1 - confidence) / 2.0
+    (low, high) = np.percentile(np.concatenate(means), [alpha * 100, (1 - alpha) * 100])
+
+    return [float(low), float(high)]
+
+def resampling_task(arguments):
+    '''
+    This method performs a single resampling task of a comparison in a worker process.
+
+    Args:
+        arguments: Either a tuple ('permutation', group1, group2, resamples, seed) or ('bootstrap', sample, resamples, seed).
+
+    Returns:
+        The p-value of the permutation test or the bootstrap confidence interval.
+    '''
+
+    if arguments[0] == 'permutation':
+        return permutation_test(arguments[1], arguments[2], arguments[3], arguments[4])
+
+    return bootstrap_interval(arguments[1], arguments[2], arguments[3])
+
+def resampling_compare(data, processes = 1, method = None, intervals = True):
+    '''
+    This method compares all the approaches with each other for all the quality indicators using permutation tests
+    and (optionally) bootstrap confidence intervals of the means. The tests are distributed across a pool of worker processes and
+    every test is seeded from its (indicator, approach, approach) position, so the results do not depend on the number of processes.
+
+    Args:
+        data: (indicators x approaches x runs) array with the indicator values achieved by each run of each approach.
+        processes: The number of worker processes (None for all the available cores).
+        method: The multiple-comparison correction method (the module default is used when None).
+        intervals: True for calculating the bootstrap confidence intervals, False when only the p-values are needed.
+
+    Returns:
+        A Comparison holding the permutation p-values (raw and corrected), the A12 effect sizes,
+        the Kruskal-Wallis p-values and the bootstrap confidence intervals (None when they are not calculated).
+    '''
+
+    data = np.asarray(data, dtype=float)
+    (indicators, approaches, runs) = data.shape
+    comparison = compare(data, method)
+
+    (first, second) = np.triu_indices(approaches, 1)
+    tasks = []
+
+    for indicator in range(0, indicators):
+        for (i, j) in zip(first, second):
+            tasks.append(('permutation', data[indicator, i], data[indicator, j], resamples, [seed, indicator, int(i), int(j)]))
+    for indicator in range(0, indicators if intervals else 0):
+        for i in range(0, approaches):
+            tasks.append(('bootstrap', data[indicator, i], resamples, [seed, indicator, i, i]))
+
+    results = utils.parallel_map(resampling_task, tasks, processes)
+
+    pair_pvalues = np.asarray(results[:indicators * len(first)], dtype=float).reshape(indicators, len(first))
+    pair_adjusted = adjust_pvalues(pair_pvalues, method)
+    bounds = None
+    if intervals:
+        bounds = np.asarray(results[indicators * len(first):], dtype=float).reshape(indicators, approaches, 2)
+
+    pvalues = np.ones((indicators, approaches, approaches))
+    adjusted = np.ones((indicators, approaches, approaches))
+    pvalues[:, first, second] = pair_pvalues
+    pvalues[:, second, first] = pair_pvalues
+    adjusted[:, first, second] = pair_adjusted
+    adjusted[:, second, first] = pair_adjusted
+
+    return Comparison(pvalues, adjusted, comparison.a12, comparison.kruskal, bounds)
+
+def format_pvalue(pvalue):
+    '''
+    This method formats a p-value for the Latex tables.
+
+    Args:
+        pvalue: The p-value.
+
+    Returns:
+        The p-value in Latex format.
+    '''
+
+    if pvalue < 2.2e-16:
+        return "$<$2.2 10$^{-16}$"
+    if pvalue < 0.001:
+        exponent = int(np.floor(np.log10(pvalue)))
+        return str(round(pvalue / 10 ** exponent, 1)) + " 10$^{" + str(exponent) + "}$"
+
+    return str(round(pvalue, 3))
@@ -1,13 +1,36 @@
+import atexit
 import csv
+import hashlib
+import io
+import multiprocessing
+import os
+import pickle
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
 import numpy as np
-import scipy as sp
-import estimating
-import matplotlib.pyplot as plt
-import matplotlib.lines as lines
-import plotting
 from os import listdir
 from os.path import isfile, join, exists
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Global Variables
+cache_folder = ".cache/"    # Sub-folder of the experiments folder holding the cached intermediate results
+prefetch_depth = 4          # Number of items read ahead by the I/O threads of prefetch_map (0 for reading each item when needed)
+archive_suffixes = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.zip')     # Files that are read as archived experiment folders
+archive_memory = 256 * 1024 * 1024  # Bytes of small members kept in memory while indexing a compressed tarball (which has no cheap random access)
+archive_spill = None        # Folder of the spill files of the compressed tarballs larger than archive_memory (None for the temporary folder of the system)
+archive_kinds = ('Results', 'Pareto', 'QoSMetrics')    # Directories of the members of a compressed tarball read by the loaders (see Archive.loadable)
+archive_selections = {}     # Archive path -> (folder, model) pairs selected by select_archive, None for a model selects all the models
+archives = {}               # Opened archives, keyed by their path
+shared = {}                 # Read-only data published to the worker processes of parallel_map (see publish)
+
 def find_final_generation(run, model, function, algorithm, folder):
     '''
     This method finds the maximum number of generation achived by an experimental run.
@@ -25,7 +48,7 @@ def find_final_generation(run, model, function, algorithm, folder):
     
     dir_name = folder + str(run) + "/" + str(model) + "/" + str(function) + "/" + str(algorithm) + "/Results/"
     
-    files = [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
+    files = list_files(dir_name)
     
     max = 0    
     
@@ -35,4 +58,569 @@ def find_final_generation(run, model, function, algorithm, folder):
         if ( temp > max ):
             max = temp
     
-    return max;
\ No newline at end of file
+    return max;
+
+def read_columns(filename, columns, delimiter = ','):
+    '''
+    This method reads a set of columns of a CSV file directly into an array, without parsing the remaining columns.
+    Files with quoted values are parsed with the csv module, the others with the faster np.loadtxt.
+    
+    Args:
+        filename: The CSV file to be read.
+        columns: The names of the columns of interest.
+        delimiter: The delimiter of the CSV file.
+        
+    Returns:
+        A two-dimensional array with one row per line of the file and one column per requested column.
+    '''
+    
+    source_file = open_file(filename)
+    header = next(csv.reader(source_file, delimiter = delimiter, quotechar = '"'))
+    header = [name.strip() for name in header]
+    usecols = [header.index(column) for column in columns]
+    
+    body = source_file.read()
+    source_file.close()
+    
+    if '"' in body:
+        rows = [row for row in csv.reader(body.splitlines(), delimiter = delimiter, quotechar = '"') if row]
+        data = np.array([[float(row[column]) for column in usecols] for row in rows])
+    else:
+        data = np.loadtxt(body.splitlines(), delimiter = delimiter, usecols = usecols, ndmin = 2)
+    
+    return data.reshape(-1, len(columns))
+
+def publish(data):
+    '''
+    This method makes read-only data available to the functions applied by parallel_map, through the shared dictionary.
+    It is the initializer of the worker processes, so the data are sent once per worker and not with every item 
+    (with the fork start method the workers inherit them without any copy).
+    
+    Args:
+        data: Dictionary of the published data.
+    '''
+    
+    shared.clear()
+    shared.update(data)
+
+def parallel_map(function, items, processes = 1, pool = None, data = None):
+    '''
+    This method applies a function to each one of the input items, optionally in a pool of worker processes.
+    
+    Args:
+        function: A module level function taking a single argument.
+        items: The list of the arguments.
+        processes: The number of worker processes (1 for serial execution, None for all the available cores).
+        pool: An open pool of worker processes to be reused (it is not closed), instead of a new one.
+        data: Dictionary of read-only data needed by every item, published once to the function (see publish).
+              A reused pool must have been created with the same data.
+        
+    Returns:
+        A list with the results in the same order as the input items.
+    '''
+    
+    items = list(items)
+    
+    if data is not None:
+        publish(data)
+    
+    if pool is not None and len(items) > 1:
+        return pool.map(function, items)
+    
+    if processes == 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    
+    if data is not None:
+        pool = multiprocessing.Pool(processes, publish, (data,))
+    else:
+        pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.map(function, items)
+    finally:
+        pool.close()
+        pool.join()
+    
+    return results
+
+def prefetch_map(function, items, depth = None):
+    '''
+    This method applies an I/O bound function to each one of the input items in a pool of threads, reading ahead 
+    of the consumer. At most depth items are read and not yet consumed at any time, so a slow consumer stops the readers 
+    (backpressure) and the memory stays bounded.
+    
+    Args:
+        function: A function taking a single argument, which must not modify shared state.
+        items: The list of the arguments.
+        depth: The number of items read ahead (the prefetch_depth of the module when None).
+        
+    Returns:
+        A generator of the results in the same order as the input items. 
+        An exception raised by the function is raised again when its result is consumed.
+    '''
+    
+    if depth is None:
+        depth = prefetch_depth
+    
+    items = list(items)
+    
+    if depth <= 0 or len(items) <= 1:
+        for item in items:
+            yield function(item)
+        return
+    
+    tasks = queue.Queue()
+    results = [None] * len(items)
+    ready = [threading.Event() for item in items]
+    
+    def read():
+        while True:
+            index = tasks.get()
+            if index is None:
+                return
+            try:
+                results[index] = (True, function(items[index]))
+            except Exception as error:
+                results[index] = (False, error)
+            ready[index].set()
+    
+    threads = [threading.Thread(target = read) for i in range(0, min(depth, len(items)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    
+    try:
+        for index in range(0, min(depth, len(items))):
+            tasks.put(index)
+        
+        for index in range(0, len(items)):
+            ready[index].wait()
+            (success, value) = results[index]
+            results[index] = None
+            # A slot has been freed, so the next item can be read
+            if index + depth < len(items):
+                tasks.put(index + depth)
+            if not success:
+                raise value
+            yield value
+    finally:
+        for thread in threads:
+            tasks.put(None)
+
+
+def fingerprint(dir_name, files):
+    '''
+    This method computes a fingerprint of a set of files based on their names, sizes and modification times.
+    
+    Args:
+        dir_name: The directory that contains the files.
+        files: The names of the files.
+        
+    Returns:
+        A hexadecimal digest which changes whenever a file is added, removed or modified.
+    '''
+    
+    digest = hashlib.sha1()
+    
+    for file in sorted(files):
+        (size, mtime) = file_status(join(dir_name, file))
+        digest.update((file + ":" + str(size) + ":" + str(mtime) + ";").encode("utf-8"))
+    
+    return digest.hexdigest()
+
+def load_cache(folder, name, key):
+    '''
+    This method loads a cached intermediate result of an experiment.
+    
+    Args:
+        folder: The folder of the experiments.
+        name: The name of the cached result.
+        key: The fingerprint of the inputs of the cached result.
+        
+    Returns:
+        The cached value, or None when there is no cached value for the given fingerprint.
+    '''
+    
+    filename = cache_directory(folder) + name + ".pickle"
+    
+    if not exists(filename):
+        return None
+    
+    try:
+        source_file = open(filename, 'rb')
+        (stored_key, value) = pickle.load(source_file)
+        source_file.close()
+    except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    
+    if stored_key != key:
+        return None
+    
+    return value
+
+def store_cache(folder, name, key, value):
+    '''
+    This method stores an intermediate result of an experiment in the cache. 
+    Failures (e.g. a read-only experiments folder) are silently ignored.
+    
+    Args:
+        folder: The folder of the experiments.
+        name: The name of the cached result.
+        key: The fingerprint of the inputs of the cached result.
+        value: The value to be cached.
+    '''
+    
+    dir_name = cache_directory(folder)
+    filename = dir_name + name + ".pickle"
+    
+    try:
+        if not exists(dir_name):
+            os.makedirs(dir_name)
+        # Write to a temporary file first so that concurrent readers never see partial results
+        temp_filename = filename + "." + str(os.getpid())
+        target_file = open(temp_filename, 'wb')
+        pickle.dump((key, value), target_file, pickle.HIGHEST_PROTOCOL)
+        target_file.close()
+        os.rename(temp_filename, filename)
+    except (IOError, OSError):
+        pass
+
+def cache_directory(folder):
+    '''
+    This method returns the directory of the cached intermediate results of an experiments folder.
+    The cache of a folder inside an archive is kept next to the archive (<archive>.cache/<folder inside the archive>).
+    '''
+    
+    (archive, name) = split_archive(folder)
+    
+    if archive is None:
+        return folder + cache_folder
+    
+    return archive + cache_folder.rstrip("/") + "/" + name
+
+def split_archive(path):
+    '''
+    This method splits a path that goes through an archive (e.g. "results.tar.gz/files2/1/Decentralised/") 
+    into the archive file and the path of the member inside it.
+    
+    Args:
+        path: The path of a file or directory.
+        
+    Returns:
+        A tuple (archive, name) with the archive file and the member path, or (None, path) when the path 
+        does not go through an archive.
+    '''
+    
+    parts = path.split("/")
+    
+    for i in range(1, len(parts) + 1):
+        candidate = "/".join(parts[0:i])
+        if candidate.endswith(archive_suffixes) and isfile(candidate):
+            return (candidate, "/".join(parts[i:]))
+    
+    return (None, path)
+
+def open_archive(filename):
+    '''
+    This method returns the (memoised) Archive of an archive file.
+    '''
+    
+    if filename not in archives:
+        archives[filename] = Archive(filename)
+    
+    return archives[filename]
+
+def select_archive(folder, model = None):
+    '''
+    This method selects the experiments of a folder inside a compressed tarball, so that the members read by the loaders 
+    are kept in memory or spilled while indexing the tarball (see Archive.loadable). An archive that was already indexed 
+    without the selected experiments is indexed again on its next use.
+    
+    Args:
+        folder: The folder of the experiments, which may not be inside an archive.
+        model: The composition model of the experiments (None for all the models).
+    '''
+    
+    (archive, name) = split_archive(folder)
+    
+    if archive is None:
+        return
+    
+    selection = (name.strip("/"), model)
+    selections = archive_selections.setdefault(archive, [])
+    
+    if selection not in selections:
+        selections.append(selection)
+        if archive in archives and not archives[archive].covers(selection):
+            del archives[archive]
+
+def list_files(dir_name):
+    '''
+    This method lists the files (not the sub-directories) of a directory, which may be inside an archive.
+    '''
+    
+    (archive, name) = split_archive(dir_name)
+    
+    if archive is None:
+        return [ f for f in listdir(dir_name) if isfile(join(dir_name,f)) ]
+    
+    return open_archive(archive).list_files(name)
+
+def path_exists(path):
+    '''
+    This method checks whether a file or directory exists, which may be inside an archive.
+    '''
+    
+    (archive, name) = split_archive(path)
+    
+    if archive is None:
+        return exists(path)
+    
+    return open_archive(archive).exists(name)
+
+def file_status(filename):
+    '''
+    This method returns a pair (size, modification time) of a file, which may be inside an archive.
+    '''
+    
+    (archive, name) = split_archive(filename)
+    
+    if archive is None:
+        status = os.stat(filename)
+        return (status.st_size, status.st_mtime)
+    
+    return open_archive(archive).status(name)
+
+def open_file(filename):
+    '''
+    This method opens a text file for reading, which may be inside an archive.
+    The members of an archive are read straight into memory, without extracting them to the disk.
+    '''
+    
+    (archive, name) = split_archive(filename)
+    
+    if archive is None:
+        return open(filename)
+    
+    data = open_archive(archive).read(name)
+    
+    # Python 2 reads text as bytes
+    if bytes is str:
+        return io.BytesIO(data)
+    
+    return io.StringIO(data.decode("utf-8"))
+
+class Archive(object):
+    '''
+    An experiments folder stored in a tar (optionally gzip, bz2 or xz compressed) or zip archive.
+    
+    The members are indexed once, in a single pass over the archive, and then read on demand. 
+    Compressed tarballs can only be read sequentially, so the members that the loaders read (see loadable) are kept 
+    in memory (up to archive_memory bytes) during the indexing pass, and the remaining ones are copied, in the same pass, 
+    to an uncompressed spill file that is read with direct seeks. The other members are only indexed, and reading one 
+    of them decompresses the tarball up to it.
+    
+    Large experiment trees should be stored in uncompressed .tar or in .zip archives, which are read with direct seeks 
+    and are neither held in memory nor spilled.
+    '''
+    
+    def __init__(self, filename):
+        self.filename = filename
+        self.members = {}       # Member path -> (member info, size, modification time)
+        self.directories = {}   # Directory path -> names of its files
+        self.contents = {}      # Member path -> bytes, for the members kept in memory
+        self.spilled = {}       # Member path -> (offset, size) in the spill file, for the other members of a compressed tarball
+        self.spill = None
+        self.spill_handle = None
+        self.spill_pid = None
+        self.handle = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.selections = archive_selections.get(filename)
+        if self.selections is not None:
+            self.selections = list(self.selections)
+        
+        if filename.endswith('.zip'):
+            self.index_zip()
+        else:
+            self.index_tar()
+    
+    def normalise(self, name):
+        '''
+        This method returns the canonical form of a member path (no leading "./" or "/", no trailing "/").
+        '''
+        
+        while name.startswith("./"):
+            name = name[2:]
+        
+        return name.strip("/")
+    
+    def covers(self, selection):
+        '''
+        This method checks whether the members of a (folder, model) selection were loadable when the archive was indexed.
+        '''
+        
+        if self.selections is None or selection in self.selections:
+            return True
+        
+        return (selection[0], None) in self.selections
+    
+    def loadable(self, name):
+        '''
+        This method checks whether a member of a compressed tarball is kept in memory or spilled while indexing the tarball:
+        a file (other than population.csv) of an archive_kinds directory of the selected experiments (see select_archive).
+        '''
+        
+        parts = name.split("/")
+        
+        if parts[-1] == 'population.csv' or not any([part in archive_kinds for part in parts[0:-1]]):
+            return False
+        
+        if self.selections is None:
+            return True
+        
+        for (folder, model) in self.selections:
+            if folder and not name.startswith(folder + "/"):
+                continue
+            rest = name[len(folder):].strip("/").split("/")
+            if model is None or (len(rest) > 1 and rest[1] == str(model)):
+                return True
+        
+        return False
+    
+    def add(self, name, info, size, mtime):
+        '''
+        This method adds a file member to the index.
+        '''
+        
+        name = self.normalise(name)
+        self.members[name] = (info, size, mtime)
+        
+        parts = name.split("/")
+        self.directories.setdefault("/".join(parts[0:-1]), []).append(parts[-1])
+        
+        # Register all the ancestor directories
+        for i in range(0, len(parts) - 1):
+            self.directories.setdefault("/".join(parts[0:i]), [])
+    
+    def index_tar(self):
+        '''
+        This method indexes the members of a tar archive in a single (streaming) pass.
+        '''
+        
+        compressed = not self.filename.endswith('.tar')
+        memory = 0
+        
+        spill = None
+        
+        stream = tarfile.open(self.filename, 'r|*')
+        for member in stream:
+            if member.isdir():
+                self.directories.setdefault(self.normalise(member.name), [])
+            elif member.isfile():
+                self.add(member.name, member, member.size, member.mtime)
+                if not compressed or not self.loadable(self.normalise(member.name)):
+                    continue
+                if memory + member.size <= archive_memory:
+                    self.contents[self.normalise(member.name)] = stream.extractfile(member).read()
+                    memory = memory + member.size
+                else:
+                    # Seeking in a compressed stream restarts the decompression, so the member is spilled in archive order
+                    if spill is None:
+                        (descriptor, self.spill) = tempfile.mkstemp(suffix = '.spill', dir = archive_spill)
+                        spill = os.fdopen(descriptor, 'wb')
+                        atexit.register(self.remove_spill, os.getpid())
+                    self.spilled[self.normalise(member.name)] = (spill.tell(), member.size)
+                    shutil.copyfileobj(stream.extractfile(member), spill)
+        stream.close()
+        
+        if spill is not None:
+            spill.close()
+    
+    def remove_spill(self, pid):
+        '''
+        This method deletes the spill file at the exit of the process that created it.
+        '''
+        
+        if os.getpid() == pid and exists(self.spill):
+            if self.spill_handle is not None:
+                self.spill_handle.close()
+            os.remove(self.spill)
+    
+    def index_zip(self):
+        '''
+        This method indexes the members of a zip archive from its central directory.
+        '''
+        
+        handle = zipfile.ZipFile(self.filename)
+        for info in handle.infolist():
+            if info.filename.endswith("/"):
+                self.directories.setdefault(self.normalise(info.filename), [])
+            else:
+                self.add(info.filename, info, info.file_size, time.mktime(info.date_time + (0, 0, -1)))
+        handle.close()
+    
+    def exists(self, name):
+        '''
+        This method checks whether a member file or directory exists.
+        '''
+        
+        name = self.normalise(name)
+        return name in self.members or name in self.directories
+    
+    def list_files(self, name):
+        '''
+        This method lists the files of a member directory.
+        '''
+        
+        name = self.normalise(name)
+        
+        if name not in self.directories:
+            raise OSError("No such directory in " + self.filename + ": " + name)
+        
+        return list(self.directories[name])
+    
+    def status(self, name):
+        '''
+        This method returns a pair (size, modification time) of a member file.
+        '''
+        
+        (info, size, mtime) = self.members[self.normalise(name)]
+        return (size, mtime)
+    
+    def read(self, name):
+        '''
+        This method reads the bytes of a member file. It is safe to call from several threads and processes.
+        '''
+        
+        name = self.normalise(name)
+        
+        if name in self.contents:
+            return self.contents[name]
+        
+        if name not in self.members:
+            raise IOError("No such file in " + self.filename + ": " + name)
+        
+        info = self.members[name][0]
+        
+        if name in self.spilled:
+            (offset, size) = self.spilled[name]
+            with self.lock:
+                if self.spill_handle is None or self.spill_pid != os.getpid():
+                    self.spill_handle = open(self.spill, 'rb')
+                    self.spill_pid = os.getpid()
+                self.spill_handle.seek(offset)
+                return self.spill_handle.read(size)
+        
+        with self.lock:
+            # A forked worker process opens its own handle, so that it does not share the file position
+            if self.handle is None or self.pid != os.getpid():
+                if self.filename.endswith('.zip'):
+                    self.handle = zipfile.ZipFile(self.filename)
+                else:
+                    self.handle = tarfile.open(self.filename, 'r:*')
+                self.pid = os.getpid()
+            
+            if self.filename.endswith('.zip'):
+                return self.handle.read(info)
+            
+            return self.handle.extractfile(info).read()
@@ -0,0 +1,207 @@
+'''
+    Live monitoring of experiments whose runs are still writing their generations.
+
+    A Watcher tails the Results/ and Pareto/ directories of a set of runs and calculates the quality indicators
+    (the same values as estimating.evolve_indicators, through RunSet.indicators) only for the generations completed
+    since its last check, so the cost of a check follows the new data and not the length of the runs.
+    After every check with new generations the evolution figures and a summary file are updated.
+
+    Example:
+        watcher = watch.Watcher(runs, model, function, algorithms, approaches, referencePoint, utopiaPoint, referenceSet,
+                                folder, pdf_names, "summary.txt", parameters.indicators_names, parameters.colors, parameters.markers, parameters.linestyle)
+        watcher.watch()
+'''
+
+import os
+import time
+import numpy as np
+from os.path import exists, getmtime
+import experiment
+import plotting
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+# Global Variables
+interval = 30       # Seconds between two checks (with inotify, the longest wait for a change of the files)
+settle = 60         # Seconds without changes after which the latest generation of a run counts as completed
+
+class Watcher(object):
+    '''
+    The incremental evolution of the quality indicators of a set of runs that are still in progress.
+    '''
+
+    def __init__(self, runs, model, function, algorithms, approaches, referencePoint, utopiaPoint, referenceSet, folder, pdf_names, summary_file, indicators_names, colors, markers, linestyle):
+        self.runs = runs
+        self.algorithms = algorithms
+        self.approaches = approaches
+        self.pdf_names = pdf_names
+        self.summary_file = summary_file
+        self.indicators_names = indicators_names
+        self.colors = colors
+        self.markers = markers
+        self.linestyle = linestyle
+        self.reference = experiment.Reference(referencePoint, utopiaPoint, referenceSet)
+        self.runsets = [experiment.load(folder, model).runset(function, algorithm) for algorithm in algorithms]
+
+        # The indicator values of the completed generations of every (algorithm, run)
+        self.values = {}
+        for a in range(0, len(algorithms)):
+            for run in range(1, runs + 1):
+                self.values[(a, run)] = []
+
+        self.notifier = None
+        self.watched = set()
+        if inotify_simple is not None:
+            self.notifier = inotify_simple.INotify()
+
+    def completed(self, runset, run, generation):
+        '''
+        This method checks whether a generation of a run has been completely written.
+        A generation is completed when the next one has started, or when its files have not changed for settle seconds.
+        A generation without a Pareto directory (e.g., no feasible solutions were written) is completed in the same way,
+        so the watcher does not stall on it.
+
+        Args:
+            runset: The RunSet of the run.
+            run: The run number.
+            generation: The generation number.
+
+        Returns:
+            True if the generation is completed, False otherwise.
+        '''
+
+        dir_name = runset.path(run)
+        results = dir_name + "Results/" + str(generation) + ".csv"
+        front = dir_name + "Pareto/Generation" + str(generation) + "/"
+
+        if exists(dir_name + "Results/" + str(generation + 1) + ".csv"):
+            return True
+
+        if not exists(results):
+            return False
+
+        changed = getmtime(results)
+        if exists(front):
+            changed = max(changed, getmtime(front))
+
+        return time.time() - changed > settle
+
+    def update(self):
+        '''
+        This method calculates the quality indicators of the generations completed since the last update.
+        Only the generations after the last completed one of every run are probed.
+
+        Returns:
+            The number of the new completed generations.
+        '''
+
+        new = 0
+
+        for (a, runset) in enumerate(self.runsets):
+            for run in range(1, self.runs + 1):
+                self.follow(runset.path(run) + "Results/")
+                values = self.values[(a, run)]
+                generation = len(values) + 1
+
+                while self.completed(runset, run, generation):
+                    # A generation without a front counts as zero, as in RunSet.evolution
+                    values.append(runset.indicators(run, self.reference, generation) or [0, 0, 0, 0])
+                    # The front is not needed any more, so the memory does not grow with the run
+                    runset.fronts.pop((run, generation), None)
+                    generation = generation + 1
+                    new = new + 1
+
+        return new
+
+    def tensor(self):
+        '''
+        This method returns the indicator values of the completed generations.
+
+        Returns:
+            (algorithms x runs x generations x indicators) array, where the generations that are not completed yet count as zero.
+        '''
+
+        generations = max([len(values) for values in self.values.values()] + [0])
+        tensor = np.zeros((len(self.algorithms), self.runs, generations, 4))
+
+        for ((a, run), values) in self.values.items():
+            if values:
+                tensor[a, run - 1, 0:len(values)] = values
+
+        return tensor
+
+    def publish(self):
+        '''
+        This method updates the evolution figures and the summary file with the completed generations.
+        '''
+
+        tensor = self.tensor()
+        means = np.round(tensor.mean(axis = 1), 4)
+        stds = np.round(tensor.std(axis = 1), 4)
+
+        tasks = []
+        for i in range(0, len(self.pdf_names)):
+            tasks.append((plotting.render_evolution, (means[:, :, i], stds[:, :, i], self.indicators_names[i], self.approaches, self.pdf_names[i], self.colors, self.markers, self.linestyle)))
+        plotting.render(tasks, processes = 1)
+
+        lines = ["Updated at " + time.strftime("%Y-%m-%d %H:%M:%S")]
+        for a in range(0, len(self.algorithms)):
+            generations = [len(self.values[(a, run)]) for run in range(1, self.runs + 1)]
+            latest = np.asarray([self.values[(a, run)][-1] for run in range(1, self.runs + 1) if self.values[(a, run)]])
+            line = str(self.approaches[a]) + ": completed generations per run = " + str(generations)
+            if len(latest) > 0:
+                for i in range(0, len(self.indicators_names)):
+                    line = line + ", " + str(self.indicators_names[i]) + " = " + str(round(latest[:, i].mean(), 4)) + " (" + str(round(latest[:, i].std(), 4)) + ")"
+            lines.append(line)
+
+        # Replace the summary file at once, so readers never see a partial file
+        temp_file = self.summary_file + ".tmp"
+        summary = open(temp_file, 'w')
+        summary.write("\n".join(lines) + "\n")
+        summary.close()
+        os.rename(temp_file, self.summary_file)
+
+    def follow(self, dir_name):
+        '''
+        This method registers a directory with inotify (when available), as soon as the directory exists.
+        '''
+
+        if self.notifier is None or dir_name in self.watched or not exists(dir_name):
+            return
+
+        flags = inotify_simple.flags
+        self.notifier.add_watch(dir_name, flags.CREATE | flags.MOVED_TO | flags.CLOSE_WRITE)
+        self.watched.add(dir_name)
+
+    def wait(self):
+        '''
+        This method waits for a change of the watched directories (inotify) or for the polling interval.
+        '''
+
+        if self.notifier is not None and self.watched:
+            self.notifier.read(timeout = int(interval * 1000))
+        else:
+            time.sleep(interval)
+
+    def watch(self, checks = None):
+        '''
+        This method keeps the evolution figures and the summary file updated while the runs progress.
+
+        Args:
+            checks: The number of checks of the experiment folder (None for watching until interrupted).
+        '''
+
+        count = 0
+
+        try:
+            while checks is None or count < checks:
+                if self.update() > 0:
+                    self.publish()
+                count = count + 1
+                if checks is None or count < checks:
+                    self.wait()
+        except KeyboardInterrupt:
+            pass